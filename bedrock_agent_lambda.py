@@ -1,21 +1,46 @@
 import json
 import boto3
+from boto3.dynamodb.types import TypeDeserializer
+from botocore.config import Config
 import os
 import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from decimal import Decimal
 import uuid
 import re
+import math
+import operator
+import time
+from typing import Any
 
 # Configure logging
 logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO').upper())
+
+# The agent answers a user who is waiting, so a single retry is the most the
+# response can afford and a stalled connect fails after a second; the pool
+# covers the four prefetch workers plus the handler thread
+AWS_CLIENT_CONFIG = Config(
+    tcp_keepalive=True,
+    retries={'mode': 'adaptive', 'max_attempts': 2},
+    connect_timeout=1,
+    read_timeout=10,
+    max_pool_connections=8
+)
+# Model generation and the synchronous insights invoke take far longer to answer
+BEDROCK_CLIENT_CONFIG = AWS_CLIENT_CONFIG.merge(Config(read_timeout=60))
 
 # Initialize AWS clients
-bedrock_runtime = boto3.client('bedrock-runtime')
-dynamodb = boto3.resource('dynamodb')
-sns = boto3.client('sns')
-lambda_client = boto3.client('lambda')
+bedrock_runtime = boto3.client('bedrock-runtime', config=BEDROCK_CLIENT_CONFIG)
+dynamodb = boto3.client('dynamodb', config=AWS_CLIENT_CONFIG)
+sns = boto3.client('sns', config=AWS_CLIENT_CONFIG)
+lambda_client = boto3.client('lambda', config=BEDROCK_CLIENT_CONFIG)
+
+# Shared pool for fanning out independent reads; reused across warm invocations
+_executor = ThreadPoolExecutor(max_workers=4)
 
 # Environment variables
 VITALS_TABLE = os.environ['VITALS_TABLE']
@@ -23,17 +48,210 @@ MEDICATIONS_TABLE = os.environ['MEDICATIONS_TABLE']
 PROFILES_TABLE = os.environ['PROFILES_TABLE']
 ALERTS_TOPIC = os.environ['ALERTS_TOPIC']
 REMINDERS_TOPIC = os.environ['REMINDERS_TOPIC']
+DAX_ENDPOINT = os.environ.get('DAX_ENDPOINT')
+
+# Read-heavy lookups go through DAX when a cluster endpoint is configured;
+# writes keep using the regular DynamoDB client
+if DAX_ENDPOINT:
+    from amazondax import AmazonDaxClient
+    dax = AmazonDaxClient(endpoint_url=DAX_ENDPOINT)
+else:
+    dax = dynamodb
+
+# Reads use the low-level client, so only responses need deserializing
+_deserializer = TypeDeserializer()
+ACTIVE_STATUS_VALUE = {'S': 'active'}
+
+def json_default(value):
+    """Serialize DynamoDB Decimals as ints or floats"""
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+# Compact encoder for handler bodies, embedding requests and alert payloads
+encode_json = json.JSONEncoder(separators=(',', ':'), default=json_default).encode
+
+# Insights change slowly, so a container reuses them for up to an hour per
+# day; the least recently used users are evicted past the size cap
+INSIGHTS_CACHE_TTL_SECONDS = 3600
+INSIGHTS_CACHE_MAX_ENTRIES = 256
+_insights_cache = OrderedDict()
+
+# Readings returned as healthData, and the newest of them the prompts use
+RECENT_VITALS_LIMIT = 50
+PROMPT_VITALS_LIMIT = 5
+
+# Required vitals and their plausible (min, max) ranges for validate_health_data
+HEALTH_DATA_RANGES = {
+    'heartRate': (20, 300),
+    'systolicBP': (50, 300),
+    'diastolicBP': (30, 200),
+    'temperature': (80, 120)
+}
 
 # Bedrock model configuration
 NOVA_MODEL_ID = "amazon.titan-text-express-v1:0:8k"  # using amazon. titan-lite-v1 as an example
 
+# Semantic response cache configuration
+EMBEDDING_MODEL_ID = "amazon.titan-embed-text-v1"
+SEMANTIC_CACHE_THRESHOLD = 0.92
+SEMANTIC_CACHE_TTL_SECONDS = 300
+SEMANTIC_CACHE_MAX_ENTRIES = 20  # Per (user_id, request type, prompt hash) key
+SEMANTIC_CACHE_MAX_KEYS = 256
+
+# Semantic cache kept warm per container: (user_id, request type, prompt hash)
+# -> entries, least recently stored keys first
+_semantic_cache = OrderedDict()
+
+# Intent keywords in priority order, compiled once per container
+INTENT_PATTERNS = [
+    (intent, re.compile('|'.join(map(re.escape, keywords))))
+    for intent, keywords in [
+        ('medication', ['medication', 'medicine', 'pill', 'dose']),
+        ('emergency', ['emergency', 'urgent', 'help', 'pain']),
+        ('health', ['health', 'vitals', 'blood pressure', 'heart rate']),
+        ('insights', ['insights', 'recommendations', 'advice'])
+    ]
+]
+
+@dataclass(slots=True)
+class UserContext:
+    """Profile fields used to personalize prompts, with their prompt defaults"""
+    age: Any = 'Unknown'
+    medical_conditions: Any = 'None reported'
+    medications: Any = 'None'
+    health_goals: Any = 'None specified'
+    emergency_contacts: Any = 'None'
+
+# Profile attribute -> UserContext field
+USER_CONTEXT_FIELDS = {
+    'age': 'age',
+    'medicalConditions': 'medical_conditions',
+    'medications': 'medications',
+    'healthGoals': 'health_goals',
+    'emergencyContacts': 'emergency_contacts'
+}
+# Placeholders keep the projection safe from DynamoDB reserved words
+USER_CONTEXT_ATTRIBUTE_NAMES = {f'#{field}': key for key, field in USER_CONTEXT_FIELDS.items()}
+USER_CONTEXT_PROJECTION = ', '.join(USER_CONTEXT_ATTRIBUTE_NAMES)
+
+# Prompt templates, built once per container and filled with str.format_map
+HEALTH_ASSISTANT_SYSTEM_TEMPLATE = """
+You are an AI health assistant powered by Amazon Nova. Your role is to provide helpful health information and guidance while maintaining appropriate medical boundaries.
+
+Key Guidelines:
+1. Always remind users to consult with healthcare professionals for medical advice
+2. Provide general health information and lifestyle recommendations
+3. Help users understand their health data and trends
+4. Assist with medication reminders and adherence
+5. Monitor for emergency conditions and provide appropriate guidance
+6. Maintain patient privacy and confidentiality
+7. Be empathetic and supportive in your responses
+
+User Context:
+- Age: {user.age}
+- Medical Conditions: {user.medical_conditions}
+- Current Medications: {user.medications}
+- Health Goals: {user.health_goals}
+
+Remember: You are not a replacement for professional medical care. Always encourage users to seek professional medical advice for serious health concerns.
+"""
+
+CHAT_PROMPT_TEMPLATE = """
+User: {message}
+
+Please provide a helpful response as a health assistant. Consider the user's health context and provide appropriate guidance.
+"""
+
+HEALTH_SYSTEM_PROMPT = "You are a health assistant analyzing user health data."
+HEALTH_CONTEXT_TEMPLATE = """
+User Context:
+- Age: {user.age}
+- Medical Conditions: {user.medical_conditions}
+- Medications: {user.medications}
+
+Recent Health Data (last 7 days):
+{vitals}
+"""
+HEALTH_PROMPT_TEMPLATE = """
+User Query: {message}
+
+Please analyze the health data and provide insights, recommendations, or answer the user's question about their health.
+"""
+
+MEDICATION_SYSTEM_PROMPT = "You are a health assistant helping with medication management."
+MEDICATION_CONTEXT_TEMPLATE = """
+User Context:
+- Age: {user.age}
+- Medical Conditions: {user.medical_conditions}
+
+Current Medications:
+{medicationList}
+"""
+MEDICATION_PROMPT_TEMPLATE = """
+User Query: {message}
+
+Please help with medication-related questions, provide reminders, or offer guidance about medication management.
+"""
+
+EMERGENCY_SYSTEM_PROMPT = "You are a health assistant monitoring for emergency conditions."
+EMERGENCY_CONTEXT_TEMPLATE = """
+User Context:
+- Age: {user.age}
+- Medical Conditions: {user.medical_conditions}
+- Emergency Contacts: {user.emergency_contacts}
+
+Current Vitals:
+{vitals}
+
+Emergency Conditions Detected:
+{conditions}
+"""
+EMERGENCY_PROMPT_TEMPLATE = """
+User Query: {message}
+
+Please assess the situation and provide appropriate emergency guidance. If critical conditions are detected, recommend immediate medical attention.
+"""
+
+INSIGHTS_SYSTEM_PROMPT = "You are a health assistant providing personalized health insights."
+INSIGHTS_CONTEXT_TEMPLATE = """
+User Context:
+- Age: {user.age}
+- Medical Conditions: {user.medical_conditions}
+- Health Goals: {user.health_goals}
+
+Health Insights:
+{insights}
+"""
+INSIGHTS_PROMPT_TEMPLATE = """
+User Query: {message}
+
+Please provide personalized health insights, recommendations, and guidance based on the user's health data and context.
+"""
+
+GENERAL_SYSTEM_PROMPT = "You are a helpful health assistant."
+GENERAL_CONTEXT_TEMPLATE = """
+User Context:
+- Age: {user.age}
+- Medical Conditions: {user.medical_conditions}
+"""
+GENERAL_PROMPT_TEMPLATE = """
+User Query: {message}
+
+Please provide helpful information and guidance. If the query is health-related, provide appropriate medical guidance while reminding the user to consult with healthcare professionals for medical advice.
+"""
+
 
 def lambda_handler(event, context):
     """
     Bedrock Agent Lambda function for orchestrating health assistant
     conversations and decision-making using Amazon Nova models
     """
-    logger.info(f"Processing Bedrock Agent event: {json.dumps(event)}")
+    # Event payloads can be kilobytes; only serialize them when debugging
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Processing Bedrock Agent event: {encode_json(event)}")
+    else:
+        logger.info(f"Processing Bedrock Agent event: {event.get('httpMethod')} {event.get('apiPath')}")
 
     # This is the new logic to handle the REAL Bedrock Agent event
     api_path = event.get('apiPath')
@@ -60,20 +278,34 @@ def lambda_handler(event, context):
     if not user_id:
         user_id = 'default-user' # Fallback for safety
 
-    user_context = get_user_context(user_id)
+    # Fetch the profile and the route's own data concurrently
+    user_context_future = _executor.submit(get_user_context, user_id)
+    if api_path in ('/insights', '/recommendations'):
+        data_future = _executor.submit(get_health_insights, user_id)
+    elif api_path == '/medications' and http_method == 'GET':
+        data_future = _executor.submit(get_user_medications, user_id)
+    elif api_path == '/vitals' and http_method == 'GET':
+        data_future = _executor.submit(get_recent_vitals, user_id, 7)
+    else:
+        data_future = None
+    user_context = user_context_future.result()
 
     # Map apiPath to your existing functions
     try:
         response_body = {}
         if api_path == '/insights':
-            response_body = handle_insights_request(user_id, message, user_context, session_id)
+            response_body = handle_insights_request(user_id, message, user_context, session_id,
+                                                    insights=data_future.result())
         elif api_path == '/recommendations':
             # You'll need to create a simple handler for this
-            response_body = handle_insights_request(user_id, message, user_context, session_id) # Re-using insights
+            response_body = handle_insights_request(user_id, message, user_context, session_id,
+                                                    insights=data_future.result()) # Re-using insights
         elif api_path == '/medications' and http_method == 'GET':
-            response_body = handle_medication_query(user_id, "Get my medications", user_context, session_id)
+            response_body = handle_medication_query(user_id, "Get my medications", user_context, session_id,
+                                                    medications=data_future.result())
         elif api_path == '/vitals' and http_method == 'GET':
-            response_body = handle_health_query(user_id, "Get my recent vitals", user_context, session_id)
+            response_body = handle_health_query(user_id, "Get my recent vitals", user_context, session_id,
+                                                recent_vitals=data_future.result())
         else:
             # Fallback to general chat
             response_body = handle_chat_request(user_id, message, user_context, session_id)
@@ -110,23 +342,18 @@ def handle_chat_request(user_id, message, user_context, session_id):
         conversation_history = get_conversation_history(user_id, session_id)
         
         # Prepare the prompt for Nova
-        nova_prompt = f"""
-{system_prompt}
-
-User: {message}
-
-Please provide a helpful response as a health assistant. Consider the user's health context and provide appropriate guidance.
-"""
+        nova_prompt = CHAT_PROMPT_TEMPLATE.format_map({'message': message})
         
         # Call Nova model
-        response = call_nova_model(nova_prompt)
+        response = call_nova_model(nova_prompt, system_prompt=system_prompt,
+                                   cache_key=(user_id, 'chat'), cache_text=message)
         
         # Save conversation
         save_conversation(user_id, session_id, message, response)
         
         return {
             'statusCode': 200,
-            'body': json.dumps({
+            'body': encode_json({
                 'userId': user_id,
                 'sessionId': session_id,
                 'response': response,
@@ -138,38 +365,28 @@ Please provide a helpful response as a health assistant. Consider the user's hea
         logger.error(f"Error handling chat request: {str(e)}")
         raise
 
-def handle_health_query(user_id, message, user_context, session_id):
+def handle_health_query(user_id, message, user_context, session_id, recent_vitals=None):
     """Handle health-specific queries"""
     try:
-        # Get recent health data
-        recent_vitals = get_recent_vitals(user_id, 7)  # Last 7 days
+        # Get recent health data unless already prefetched
+        if recent_vitals is None:
+            recent_vitals = get_recent_vitals(user_id, 7)  # Last 7 days
         
         # Prepare health-specific prompt
-        health_prompt = f"""
-You are a health assistant analyzing user health data. 
-
-User Context:
-- Age: {user_context.get('age', 'Unknown')}
-- Medical Conditions: {user_context.get('medicalConditions', 'None reported')}
-- Medications: {user_context.get('medications', 'None')}
-
-Recent Health Data (last 7 days):
-{format_vitals_for_prompt(recent_vitals)}
-
-User Query: {message}
-
-Please analyze the health data and provide insights, recommendations, or answer the user's question about their health.
-"""
+        health_context = HEALTH_CONTEXT_TEMPLATE.format_map(
+            prompt_fields(user_context, vitals=format_vitals_for_prompt(recent_vitals[:PROMPT_VITALS_LIMIT])))
+        health_prompt = HEALTH_PROMPT_TEMPLATE.format_map({'message': message})
         
         # Call Nova model
-        response = call_nova_model(health_prompt)
+        response = call_nova_model(health_prompt, system_prompt=HEALTH_SYSTEM_PROMPT, context=health_context,
+                                   cache_key=(user_id, 'health'), cache_text=message)
         
         # Save conversation
         save_conversation(user_id, session_id, message, response)
         
         return {
             'statusCode': 200,
-            'body': json.dumps({
+            'body': encode_json({
                 'userId': user_id,
                 'sessionId': session_id,
                 'response': response,
@@ -182,37 +399,28 @@ Please analyze the health data and provide insights, recommendations, or answer
         logger.error(f"Error handling health query: {str(e)}")
         raise
 
-def handle_medication_query(user_id, message, user_context, session_id):
+def handle_medication_query(user_id, message, user_context, session_id, medications=None):
     """Handle medication-specific queries"""
     try:
-        # Get user medications
-        medications = get_user_medications(user_id)
+        # Get user medications unless already prefetched
+        if medications is None:
+            medications = get_user_medications(user_id)
         
         # Prepare medication-specific prompt
-        medication_prompt = f"""
-You are a health assistant helping with medication management.
-
-User Context:
-- Age: {user_context.get('age', 'Unknown')}
-- Medical Conditions: {user_context.get('medicalConditions', 'None reported')}
-
-Current Medications:
-{format_medications_for_prompt(medications)}
-
-User Query: {message}
-
-Please help with medication-related questions, provide reminders, or offer guidance about medication management.
-"""
+        medication_context = MEDICATION_CONTEXT_TEMPLATE.format_map(
+            prompt_fields(user_context, medicationList=format_medications_for_prompt(medications)))
+        medication_prompt = MEDICATION_PROMPT_TEMPLATE.format_map({'message': message})
         
         # Call Nova model
-        response = call_nova_model(medication_prompt)
+        response = call_nova_model(medication_prompt, system_prompt=MEDICATION_SYSTEM_PROMPT, context=medication_context,
+                                   cache_key=(user_id, 'medication'), cache_text=message)
         
         # Save conversation
         save_conversation(user_id, session_id, message, response)
         
         return {
             'statusCode': 200,
-            'body': json.dumps({
+            'body': encode_json({
                 'userId': user_id,
                 'sessionId': session_id,
                 'response': response,
@@ -225,37 +433,31 @@ Please help with medication-related questions, provide reminders, or offer guida
         logger.error(f"Error handling medication query: {str(e)}")
         raise
 
-def handle_emergency_check(user_id, message, user_context, session_id):
+def handle_emergency_check(user_id, message, user_context=None, session_id=None, current_vitals=None):
     """Handle emergency health checks"""
     try:
-        # Get current vitals
-        current_vitals = get_current_vitals(user_id)
+        # Get current vitals and user context in parallel when not supplied
+        if user_context is None:
+            user_context_future = _executor.submit(get_user_context, user_id)
+            if current_vitals is None:
+                current_vitals = get_current_vitals(user_id)
+            user_context = user_context_future.result()
+        elif current_vitals is None:
+            current_vitals = get_current_vitals(user_id)
         
         # Check for emergency conditions
         emergency_conditions = check_emergency_conditions(current_vitals)
         
         # Prepare emergency prompt
-        emergency_prompt = f"""
-You are a health assistant monitoring for emergency conditions.
-
-User Context:
-- Age: {user_context.get('age', 'Unknown')}
-- Medical Conditions: {user_context.get('medicalConditions', 'None reported')}
-- Emergency Contacts: {user_context.get('emergencyContacts', 'None')}
-
-Current Vitals:
-{format_vitals_for_prompt([current_vitals]) if current_vitals else 'No current vitals available'}
-
-Emergency Conditions Detected:
-{emergency_conditions}
-
-User Query: {message}
-
-Please assess the situation and provide appropriate emergency guidance. If critical conditions are detected, recommend immediate medical attention.
-"""
+        emergency_context = EMERGENCY_CONTEXT_TEMPLATE.format_map(prompt_fields(
+            user_context,
+            vitals=format_vitals_for_prompt([current_vitals]) if current_vitals else 'No current vitals available',
+            conditions=emergency_conditions
+        ))
+        emergency_prompt = EMERGENCY_PROMPT_TEMPLATE.format_map({'message': message})
         
         # Call Nova model
-        response = call_nova_model(emergency_prompt)
+        response = call_nova_model(emergency_prompt, system_prompt=EMERGENCY_SYSTEM_PROMPT, context=emergency_context)
         
         # If critical conditions detected, trigger emergency alerts
         if emergency_conditions:
@@ -266,7 +468,7 @@ Please assess the situation and provide appropriate emergency guidance. If criti
         
         return {
             'statusCode': 200,
-            'body': json.dumps({
+            'body': encode_json({
                 'userId': user_id,
                 'sessionId': session_id,
                 'response': response,
@@ -280,38 +482,27 @@ Please assess the situation and provide appropriate emergency guidance. If criti
         logger.error(f"Error handling emergency check: {str(e)}")
         raise
 
-def handle_insights_request(user_id, message, user_context, session_id):
+def handle_insights_request(user_id, message, user_context, session_id, insights=None):
     """Handle health insights requests"""
     try:
-        # Get health insights
-        insights = get_health_insights(user_id)
+        # Get health insights unless already prefetched
+        if insights is None:
+            insights = get_health_insights(user_id)
         
         # Prepare insights prompt
-        insights_prompt = f"""
-You are a health assistant providing personalized health insights.
-
-User Context:
-- Age: {user_context.get('age', 'Unknown')}
-- Medical Conditions: {user_context.get('medicalConditions', 'None reported')}
-- Health Goals: {user_context.get('healthGoals', 'None specified')}
-
-Health Insights:
-{insights}
-
-User Query: {message}
-
-Please provide personalized health insights, recommendations, and guidance based on the user's health data and context.
-"""
+        insights_context = INSIGHTS_CONTEXT_TEMPLATE.format_map(prompt_fields(user_context, insights=insights))
+        insights_prompt = INSIGHTS_PROMPT_TEMPLATE.format_map({'message': message})
         
         # Call Nova model
-        response = call_nova_model(insights_prompt)
+        response = call_nova_model(insights_prompt, system_prompt=INSIGHTS_SYSTEM_PROMPT, context=insights_context,
+                                   cache_key=(user_id, 'insights'), cache_text=message)
         
         # Save conversation
         save_conversation(user_id, session_id, message, response)
         
         return {
             'statusCode': 200,
-            'body': json.dumps({
+            'body': encode_json({
                 'userId': user_id,
                 'sessionId': session_id,
                 'response': response,
@@ -328,27 +519,19 @@ def handle_general_request(user_id, message, user_context, session_id):
     """Handle general requests"""
     try:
         # Prepare general prompt
-        general_prompt = f"""
-You are a helpful health assistant. 
-
-User Context:
-- Age: {user_context.get('age', 'Unknown')}
-- Medical Conditions: {user_context.get('medicalConditions', 'None reported')}
-
-User Query: {message}
-
-Please provide helpful information and guidance. If the query is health-related, provide appropriate medical guidance while reminding the user to consult with healthcare professionals for medical advice.
-"""
+        general_context = GENERAL_CONTEXT_TEMPLATE.format_map(prompt_fields(user_context))
+        general_prompt = GENERAL_PROMPT_TEMPLATE.format_map({'message': message})
         
         # Call Nova model
-        response = call_nova_model(general_prompt)
+        response = call_nova_model(general_prompt, system_prompt=GENERAL_SYSTEM_PROMPT, context=general_context,
+                                   cache_key=(user_id, 'general'), cache_text=message)
         
         # Save conversation
         save_conversation(user_id, session_id, message, response)
         
         return {
             'statusCode': 200,
-            'body': json.dumps({
+            'body': encode_json({
                 'userId': user_id,
                 'sessionId': session_id,
                 'response': response,
@@ -360,35 +543,34 @@ Please provide helpful information and guidance. If the query is health-related,
         logger.error(f"Error handling general request: {str(e)}")
         raise
 
-def call_nova_model(prompt):
-    """Call Amazon Nova model via Bedrock"""
+# Calls are not micro-batched: a Lambda execution environment handles one
+# event at a time, so a container never holds two prompts to coalesce, and
+# Bedrock batch inference jobs are asynchronous (S3 in/out), which does not fit
+# the agent's synchronous response. Repeat questions are absorbed by the
+# semantic cache instead.
+def call_nova_model(prompt, system_prompt=None, context=None, cache_key=None, cache_text=None):
+    """Call Amazon Nova model via the Bedrock Converse API, reusing semantically similar answers"""
+    query_vector = None
+    if cache_key and cache_text:
+        # Answers are only reusable for the same data: a new vitals reading,
+        # medication or profile change alters the context and misses
+        cache_key = (*cache_key, hash((system_prompt, context)))
+        try:
+            query_vector = get_text_embedding(normalize_cache_text(cache_text))
+            cached_response = lookup_semantic_cache(cache_key, query_vector)
+            if cached_response is not None:
+                logger.info("Semantic cache hit, skipping Nova model call")
+                return cached_response
+        except Exception as e:
+            logger.warning(f"Semantic cache lookup failed: {str(e)}")
+            query_vector = None
+
     try:
-        # Prepare the request body for Nova
-        request_body = {
-            "messages": [
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            "max_tokens": 1000,
-            "temperature": 0.7,
-            "top_p": 0.9
-        }
-        
-        # Call Bedrock
-        response = bedrock_runtime.invoke_model(
-            modelId=NOVA_MODEL_ID,
-            body=json.dumps(request_body),
-            contentType="application/json"
-        )
-        
-        # Parse response
-        response_body = json.loads(response['body'].read())
-        
-        # Extract the generated text
-        if 'content' in response_body and len(response_body['content']) > 0:
-            generated_text = response_body['content'][0]['text']
+        # The agent response needs the full text, so aggregate the stream
+        generated_text = ''.join(stream_nova_model(prompt, system_prompt, context))
+        if generated_text:
+            if query_vector is not None:
+                store_semantic_cache(cache_key, query_vector, generated_text)
         else:
             generated_text = "I apologize, but I'm having trouble processing your request. Please try again."
         
@@ -399,60 +581,151 @@ def call_nova_model(prompt):
         logger.error(f"Error calling Nova model: {str(e)}")
         return "I apologize, but I'm experiencing technical difficulties. Please try again later."
 
+def stream_nova_model(prompt, system_prompt=None, context=None):
+    """Yield Nova response text as Bedrock generates it"""
+    response = bedrock_runtime.converse_stream(**build_converse_request(prompt, system_prompt, context))
+    
+    for event in response['stream']:
+        if 'contentBlockDelta' in event:
+            text = event['contentBlockDelta']['delta'].get('text')
+            if text:
+                yield text
+        elif 'metadata' in event:
+            usage = event['metadata'].get('usage', {})
+            logger.info(f"Nova model usage (input tokens: {usage.get('inputTokens', 0)}, "
+                        f"output tokens: {usage.get('outputTokens', 0)})")
+
+def build_converse_request(prompt, system_prompt=None, context=None):
+    """Build Converse request arguments for the configured model"""
+    request = {
+        'modelId': NOVA_MODEL_ID,
+        'messages': [
+            {
+                'role': 'user',
+                'content': build_prompt_content(prompt, system_prompt, context)
+            }
+        ],
+        'inferenceConfig': {
+            'maxTokens': 1000,
+            'temperature': 0.7,
+            'topP': 0.9
+        }
+    }
+    return request
+
+def build_prompt_content(prompt, system_prompt=None, context=None):
+    """Build Converse user content blocks, static prefix first"""
+    # Titan text models accept neither system blocks nor cache points, so
+    # Converse prompt caching stays off until NOVA_MODEL_ID is a Nova model
+    content = []
+    if system_prompt:
+        content.append({'text': system_prompt})
+    if context:
+        content.append({'text': context})
+    content.append({'text': prompt})
+    return content
+
+def normalize_cache_text(text):
+    """Normalize a user message before embedding it for the semantic cache"""
+    return ' '.join(text.lower().split())
+
+def get_text_embedding(text):
+    """Get a unit-length Titan embedding vector for text"""
+    response = bedrock_runtime.invoke_model(
+        modelId=EMBEDDING_MODEL_ID,
+        body=encode_json({'inputText': text}),
+        contentType="application/json",
+        accept="application/json"
+    )
+    embedding = json.loads(response['body'].read())['embedding']
+    
+    # Normalize once so cosine similarity is a plain dot product
+    norm = math.sqrt(sum(value * value for value in embedding)) or 1.0
+    return [value / norm for value in embedding]
+
+def lookup_semantic_cache(cache_key, query_vector):
+    """Return the cached response most similar to the query, if close enough"""
+    now = time.time()
+    entries = [entry for entry in _semantic_cache.get(cache_key, []) if entry['expiresAt'] > now]
+    if entries:
+        _semantic_cache[cache_key] = entries
+    else:
+        _semantic_cache.pop(cache_key, None)
+    
+    best_response = None
+    best_score = SEMANTIC_CACHE_THRESHOLD
+    for entry in entries:
+        score = sum(map(operator.mul, entry['vector'], query_vector))
+        if score >= best_score:
+            best_score = score
+            best_response = entry['response']
+    
+    return best_response
+
+def store_semantic_cache(cache_key, query_vector, response):
+    """Store a model response in the semantic cache"""
+    entries = _semantic_cache.setdefault(cache_key, [])
+    _semantic_cache.move_to_end(cache_key)
+    entries.append({
+        'vector': query_vector,
+        'response': response,
+        'expiresAt': time.time() + SEMANTIC_CACHE_TTL_SECONDS
+    })
+    if len(entries) > SEMANTIC_CACHE_MAX_ENTRIES:
+        del entries[:-SEMANTIC_CACHE_MAX_ENTRIES]
+    
+    # Bound the number of users a warm container keeps responses for
+    while len(_semantic_cache) > SEMANTIC_CACHE_MAX_KEYS:
+        _semantic_cache.popitem(last=False)
+
 def create_health_assistant_system_prompt(user_context):
     """Create system prompt for health assistant"""
-    return f"""
-You are an AI health assistant powered by Amazon Nova. Your role is to provide helpful health information and guidance while maintaining appropriate medical boundaries.
-
-Key Guidelines:
-1. Always remind users to consult with healthcare professionals for medical advice
-2. Provide general health information and lifestyle recommendations
-3. Help users understand their health data and trends
-4. Assist with medication reminders and adherence
-5. Monitor for emergency conditions and provide appropriate guidance
-6. Maintain patient privacy and confidentiality
-7. Be empathetic and supportive in your responses
+    return HEALTH_ASSISTANT_SYSTEM_TEMPLATE.format_map(prompt_fields(user_context))
 
-User Context:
-- Age: {user_context.get('age', 'Unknown')}
-- Medical Conditions: {user_context.get('medicalConditions', 'None reported')}
-- Current Medications: {user_context.get('medications', 'None')}
-- Health Goals: {user_context.get('healthGoals', 'None specified')}
+def prompt_fields(user_context, **fields):
+    """Build the format_map fields for a prompt template"""
+    fields['user'] = user_context
+    return fields
 
-Remember: You are not a replacement for professional medical care. Always encourage users to seek professional medical advice for serious health concerns.
-"""
+def deserialize_item(item):
+    """Convert a low-level DynamoDB item into plain Python values"""
+    return {key: _deserializer.deserialize(value) for key, value in item.items()}
 
 def get_user_context(user_id):
     """Get user context from profile"""
     try:
-        table = dynamodb.Table(PROFILES_TABLE)
-        response = table.get_item(Key={'userId': user_id})
-        return response.get('Item', {})
+        response = dax.get_item(
+            TableName=PROFILES_TABLE,
+            Key={'userId': {'S': user_id}},
+            ProjectionExpression=USER_CONTEXT_PROJECTION,
+            ExpressionAttributeNames=USER_CONTEXT_ATTRIBUTE_NAMES
+        )
+        profile = deserialize_item(response.get('Item', {}))
+        return UserContext(**{field: profile[key] for key, field in USER_CONTEXT_FIELDS.items() if key in profile})
     except Exception as e:
         logger.error(f"Error getting user context: {str(e)}")
-        return {}
+        return UserContext()
 
-def get_recent_vitals(user_id, days=7):
-    """Get recent vitals for a user"""
+def get_recent_vitals(user_id, days=7, limit=RECENT_VITALS_LIMIT):
+    """Get the most recent vitals for a user, newest first"""
     try:
-        table = dynamodb.Table(VITALS_TABLE)
-        
         # Calculate time threshold
         threshold = datetime.utcnow() - timedelta(days=days)
         threshold_str = threshold.isoformat()
         
-        response = table.query(
+        response = dax.query(
+            TableName=VITALS_TABLE,
             KeyConditionExpression='userId = :userId AND #ts >= :threshold',
             ExpressionAttributeNames={'#ts': 'timestamp'},
             ExpressionAttributeValues={
-                ':userId': user_id,
-                ':threshold': threshold_str
+                ':userId': {'S': user_id},
+                ':threshold': {'S': threshold_str}
             },
             ScanIndexForward=False,
-            Limit=50
+            Limit=limit
         )
         
-        return response.get('Items', [])
+        return [deserialize_item(item) for item in response.get('Items', [])]
     except Exception as e:
         logger.error(f"Error getting recent vitals: {str(e)}")
         return []
@@ -460,17 +733,18 @@ def get_recent_vitals(user_id, days=7):
 def get_current_vitals(user_id):
     """Get most recent vitals for a user"""
     try:
-        table = dynamodb.Table(VITALS_TABLE)
-        
-        response = table.query(
+        response = dax.query(
+            TableName=VITALS_TABLE,
             KeyConditionExpression='userId = :userId',
-            ExpressionAttributeValues={':userId': user_id},
+            ProjectionExpression='#ts, vitals',
+            ExpressionAttributeNames={'#ts': 'timestamp'},
+            ExpressionAttributeValues={':userId': {'S': user_id}},
             ScanIndexForward=False,
             Limit=1
         )
         
         items = response.get('Items', [])
-        return items[0] if items else None
+        return deserialize_item(items[0]) if items else None
     except Exception as e:
         logger.error(f"Error getting current vitals: {str(e)}")
         return None
@@ -478,27 +752,39 @@ def get_current_vitals(user_id):
 def get_user_medications(user_id):
     """Get user medications"""
     try:
-        table = dynamodb.Table(MEDICATIONS_TABLE)
-        
-        response = table.query(
+        # Inactive medications are filtered server-side to cut response bytes
+        response = dax.query(
+            TableName=MEDICATIONS_TABLE,
             KeyConditionExpression='userId = :userId',
-            ExpressionAttributeValues={':userId': user_id}
+            FilterExpression='#status = :active',
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={
+                ':userId': {'S': user_id},
+                ':active': ACTIVE_STATUS_VALUE
+            }
         )
         
-        medications = response.get('Items', [])
-        return [m for m in medications if m.get('status') == 'active']
+        return [deserialize_item(item) for item in response.get('Items', [])]
     except Exception as e:
         logger.error(f"Error getting user medications: {str(e)}")
         return []
 
 def get_health_insights(user_id):
-    """Get health insights for a user"""
+    """Get health insights for a user, reusing recently generated ones"""
+    cache_key = (user_id, datetime.utcnow().date().isoformat())
+    cached = _insights_cache.get(cache_key)
+    if cached:
+        if cached['expiresAt'] > time.time():
+            _insights_cache.move_to_end(cache_key)
+            return cached['insights']
+        _insights_cache.pop(cache_key, None)
+    
     try:
         # Call health insights Lambda function
         response = lambda_client.invoke(
             FunctionName=os.environ.get('HEALTH_INSIGHTS_FUNCTION', 'health-insights'),
             InvocationType='RequestResponse',
-            Payload=json.dumps({
+            Payload=encode_json({
                 'action': 'generate_insights',
                 'userId': user_id,
                 'days': 30
@@ -506,7 +792,15 @@ def get_health_insights(user_id):
         )
         
         result = json.loads(response['Payload'].read())
-        return result.get('body', {})
+        insights = result.get('body', {})
+        if result.get('statusCode') == 200:
+            _insights_cache[cache_key] = {
+                'insights': insights,
+                'expiresAt': time.time() + INSIGHTS_CACHE_TTL_SECONDS
+            }
+            while len(_insights_cache) > INSIGHTS_CACHE_MAX_ENTRIES:
+                _insights_cache.popitem(last=False)
+        return insights
     except Exception as e:
         logger.error(f"Error getting health insights: {str(e)}")
         return {}
@@ -549,7 +843,7 @@ def trigger_emergency_alert(user_id, conditions, vitals):
         lambda_client.invoke(
             FunctionName=os.environ.get('EMERGENCY_ALERTS_FUNCTION', 'emergency-alerts'),
             InvocationType='Event',  # Async invocation
-            Payload=json.dumps({
+            Payload=encode_json({
                 'action': 'send_emergency_alert',
                 'userId': user_id,
                 'condition': {
@@ -568,41 +862,41 @@ def trigger_emergency_alert(user_id, conditions, vitals):
         logger.error(f"Error triggering emergency alert: {str(e)}")
 
 def format_vitals_for_prompt(vitals_list):
-    """Format vitals data for prompt"""
+    """Format vitals data for prompt as compact CSV rows"""
     if not vitals_list:
         return "No recent vitals data available"
     
-    formatted = []
-    for vitals in vitals_list[-5:]:  # Last 5 readings
-        timestamp = vitals.get('timestamp', 'Unknown time')
+    columns = vitals_prompt_columns(vitals_list)
+    rows = ['time,' + ','.join(columns)]
+    for vitals in vitals_list:
+        # str() of a DynamoDB Decimal is already its compact numeric form
         vitals_data = vitals.get('vitals', {})
-        
-        vitals_str = f"Time: {timestamp}\n"
-        for key, value in vitals_data.items():
-            if isinstance(value, Decimal):
-                vitals_str += f"  {key}: {float(value)}\n"
-            else:
-                vitals_str += f"  {key}: {value}\n"
-        
-        formatted.append(vitals_str)
+        rows.append(','.join([vitals.get('timestamp', 'Unknown time')] +
+                             [str(vitals_data.get(key, '')) for key in columns]))
     
-    return "\n".join(formatted)
+    return "\n".join(rows)
+
+def vitals_prompt_columns(vitals_list):
+    """List the vitals keys present across readings, in first-seen order"""
+    columns = {}
+    for vitals in vitals_list:
+        columns.update(dict.fromkeys(vitals.get('vitals', {})))
+    return list(columns)
 
 def format_medications_for_prompt(medications):
-    """Format medications data for prompt"""
+    """Format medications data for prompt as compact rows"""
     if not medications:
         return "No current medications"
     
-    formatted = []
+    rows = ['name | dose | frequency | last taken | adherence %']
     for med in medications:
-        med_str = f"Medication: {med.get('medicationName', 'Unknown')}\n"
-        med_str += f"  Dosage: {med.get('dosage', 'Unknown')}\n"
-        med_str += f"  Frequency: {med.get('frequency', 'Unknown')}\n"
-        med_str += f"  Last Taken: {med.get('lastTaken', 'Never')}\n"
-        med_str += f"  Adherence Rate: {med.get('adherenceRate', 0)}%\n"
-        formatted.append(med_str)
+        rows.append(
+            f"{med.get('medicationName', 'Unknown')} | {med.get('dosage', 'Unknown')} | "
+            f"{med.get('frequency', 'Unknown')} | {med.get('lastTaken', 'Never')} | "
+            f"{med.get('adherenceRate', 0)}"
+        )
     
-    return "\n".join(formatted)
+    return "\n".join(rows)
 
 def get_conversation_history(user_id, session_id):
     """Get conversation history for a session"""
@@ -619,28 +913,24 @@ def save_conversation(user_id, session_id, user_message, assistant_response):
     try:
         # This would typically save to a conversations table
         # For now, just log the conversation
-        logger.info(f"Conversation saved - User: {user_id}, Session: {session_id}")
-        logger.info(f"User: {user_message}")
-        logger.info(f"Assistant: {assistant_response}")
+        logger.info(f"Conversation saved - User: {user_id}, Session: {session_id}, "
+                    f"Response length: {len(assistant_response)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"User: {user_message}")
+            logger.debug(f"Assistant: {assistant_response}")
     except Exception as e:
         logger.error(f"Error saving conversation: {str(e)}")
 
 def analyze_user_intent(message):
     """Analyze user intent from message"""
     try:
-        # Simple intent analysis based on keywords
+        # Simple intent analysis based on keywords, one compiled scan per intent
         message_lower = message.lower()
         
-        if any(word in message_lower for word in ['medication', 'medicine', 'pill', 'dose']):
-            return 'medication'
-        elif any(word in message_lower for word in ['emergency', 'urgent', 'help', 'pain']):
-            return 'emergency'
-        elif any(word in message_lower for word in ['health', 'vitals', 'blood pressure', 'heart rate']):
-            return 'health'
-        elif any(word in message_lower for word in ['insights', 'recommendations', 'advice']):
-            return 'insights'
-        else:
-            return 'general'
+        for intent, pattern in INTENT_PATTERNS:
+            if pattern.search(message_lower):
+                return intent
+        return 'general'
     except Exception as e:
         logger.error(f"Error analyzing user intent: {str(e)}")
         return 'general'
@@ -653,28 +943,13 @@ def validate_health_data(vitals):
         
         vitals_data = vitals['vitals']
         
-        # Check for required fields
-        required_fields = ['heartRate', 'systolicBP', 'diastolicBP', 'temperature']
-        for field in required_fields:
+        # Every required field must be present and, when set, within range
+        for field, (minimum, maximum) in HEALTH_DATA_RANGES.items():
             if field not in vitals_data:
                 return False
-        
-        # Validate ranges
-        heart_rate = vitals_data.get('heartRate')
-        if heart_rate and (heart_rate < 20 or heart_rate > 300):
-            return False
-        
-        systolic = vitals_data.get('systolicBP')
-        if systolic and (systolic < 50 or systolic > 300):
-            return False
-        
-        diastolic = vitals_data.get('diastolicBP')
-        if diastolic and (diastolic < 30 or diastolic > 200):
-            return False
-        
-        temperature = vitals_data.get('temperature')
-        if temperature and (temperature < 80 or temperature > 120):
-            return False
+            value = vitals_data[field]
+            if value and not minimum <= value <= maximum:
+                return False
         
         return True
     except Exception as e:
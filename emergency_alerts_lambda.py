@@ -1,23 +1,133 @@
 import json
 import boto3
+from botocore.config import Config
 import os
 import logging
-from datetime import datetime, timedelta
-from decimal import Decimal
-import uuid
+from concurrent.futures import ThreadPoolExecutor
+import math
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+from datetime import datetime, timedelta, timezone
+from boto3.dynamodb.conditions import Key
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# An alert that fails to publish never reaches a contact, so SNS calls retry
+# (adaptive backs off when a burst throttles); the pool matches the four
+# PublishBatch workers plus the handler thread
+AWS_CLIENT_CONFIG = Config(
+    tcp_keepalive=True,
+    retries={'mode': 'adaptive', 'max_attempts': 3},
+    max_pool_connections=8
+)
+
 # Initialize AWS clients
-dynamodb = boto3.resource('dynamodb')
-sns = boto3.client('sns')
-cloudwatch = boto3.client('cloudwatch')
+sns = boto3.client('sns', config=AWS_CLIENT_CONFIG)
+
+# Worker threads for concurrent SNS requests, reused across warm invocations
+_executor = ThreadPoolExecutor(max_workers=4)
+
+# DynamoDB is only needed for emergency history lookups, so the resource is
+# created on first use instead of at cold start
+dynamodb = None
 
 # Environment variables
 ALERTS_TOPIC = os.environ['ALERTS_TOPIC']
 NOTIFICATION_EMAIL = os.environ['NOTIFICATION_EMAIL']
+EMERGENCIES_TABLE = os.environ.get('EMERGENCIES_TABLE')
+LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', '0.01'))
+
+# Fields returned by emergency history queries; aliased since 'timestamp'
+# and 'message' are DynamoDB reserved words
+EMERGENCY_HISTORY_ATTRIBUTE_NAMES = {
+    '#timestamp': 'timestamp',
+    '#conditionType': 'conditionType',
+    '#severity': 'severity',
+    '#message': 'message',
+    '#alertSent': 'alertSent'
+}
+EMERGENCY_HISTORY_PROJECTION = ', '.join(EMERGENCY_HISTORY_ATTRIBUTE_NAMES)
+
+# Compact encoder for responses, alert payloads and metric lines
+encode_json = json.JSONEncoder(separators=(',', ':'), default=str).encode
+
+# SNS PublishBatch accepts at most 10 entries per request
+SNS_BATCH_SIZE = 10
+
+# Emergency counts per condition type, flushed as Embedded Metric Format
+# log lines once per invocation instead of calling the CloudWatch API
+METRICS_NAMESPACE = 'HealthAssistant/Emergencies'
+_metric_buffer = Counter()
+
+# Emergency thresholds per vital: (condition type, reading template, vitals
+# keys, critical (low, high) per key, emergency (low, high) per key)
+VITAL_THRESHOLDS = (
+    ('HEART_RATE', 'Heart rate %s bpm', ('heartRate',),
+     ((30, 220),), ((40, 180),)),
+    ('BLOOD_PRESSURE', 'Blood pressure %s mmHg', ('systolicBP', 'diastolicBP'),
+     ((-math.inf, 200), (-math.inf, 120)), ((-math.inf, 180), (-math.inf, 110))),
+    ('TEMPERATURE', 'Temperature %s°F', ('temperature',),
+     ((90, 107),), ((95, 105),)),
+    ('OXYGEN_SATURATION', 'Oxygen saturation %s%%', ('oxygenSaturation',),
+     ((80, math.inf),), ((90, math.inf),)),
+)
+
+# Severity tiers indexed by how many threshold bands a reading falls outside:
+# (type/message prefix, severity, message outcome, action required)
+SEVERITY_TIERS = (
+    None,
+    ('EMERGENCY', 'HIGH', 'requires immediate attention', 'URGENT_MEDICAL_CARE'),
+    ('CRITICAL', 'CRITICAL', 'is life-threatening', 'IMMEDIATE_MEDICAL_ATTENTION'),
+)
+
+# Condition templates per vital, indexed by severity level:
+# (vitals keys, critical ranges, emergency ranges,
+#  (None, (type, severity, action required, message template) per tier))
+VITAL_RULES = tuple(
+    (keys, critical_ranges, emergency_ranges, (None,) + tuple(
+        (f'{prefix}_{condition_type}', severity, action_required, f'{prefix}: {reading} {outcome}')
+        for prefix, severity, outcome, action_required in SEVERITY_TIERS[1:]
+    ))
+    for condition_type, reading, keys, critical_ranges, emergency_ranges in VITAL_THRESHOLDS
+)
+
+# Plausibility bounds for validate_emergency_thresholds:
+# (vital, critical min, critical max, normal min, normal max)
+VALIDATION_THRESHOLDS = (
+    ('heartRate', 20, 250, 30, 220),
+    ('systolicBP', 50, 300, 70, 250),
+    ('diastolicBP', 30, 200, 40, 150),
+    ('temperature', 85, 115, 90, 110),
+    ('oxygenSaturation', 60, 100, 70, 100),
+)
+VALIDATION_TIERS = (None, ('HIGH', 'normal'), ('CRITICAL', 'critical'))
+
+# Boolean device flags: (vitals key, condition type, severity, message, action)
+FLAG_CONDITIONS = (
+    ('panicButton', 'PANIC_BUTTON_ACTIVATED', 'CRITICAL',
+     'CRITICAL: Panic button activated - immediate assistance required',
+     'IMMEDIATE_EMERGENCY_RESPONSE'),
+    ('fallDetected', 'FALL_DETECTED', 'HIGH',
+     'EMERGENCY: Fall detected - immediate assistance may be needed',
+     'CHECK_PATIENT_CONDITION'),
+)
+
+def now_iso():
+    """Current UTC time as a timezone-aware ISO 8601 string"""
+    return datetime.now(timezone.utc).isoformat()
+
+@dataclass(slots=True)
+class EmergencyContext:
+    """Values derived once per emergency event and shared by its handlers"""
+    now_iso: str
+    user_id: str
+    vitals: dict
 
 def lambda_handler(event, context):
     """
@@ -25,269 +135,312 @@ def lambda_handler(event, context):
     emergencies and sending immediate notifications
     """
     try:
-        logger.info(f"Processing emergency alerts event: {json.dumps(event)}")
+        # Only a sample of raw events is logged; errors are always logged
+        if LOG_SAMPLE_RATE and logger.isEnabledFor(logging.INFO) and random.random() < LOG_SAMPLE_RATE:
+            logger.info("Processing emergency alerts event: %s", event)
+        
+        # One timestamp for every artifact produced by this invocation
+        invoked_at = now_iso()
         
         # Parse the incoming event
-        if 'Records' in event:
-            # SQS/EventBridge trigger
-            for record in event['Records']:
-                process_emergency_event(record)
-        else:
-            # Direct API call
-            process_emergency_event(event)
+        failed_message_ids = (_handle_sqs if 'Records' in event else _handle_direct)(event, invoked_at)
         
-        return {
+        response = {
             'statusCode': 200,
-            'body': json.dumps({
+            'body': encode_json({
                 'message': 'Emergency alerts processed successfully',
-                'timestamp': datetime.utcnow().isoformat()
+                'timestamp': invoked_at
             })
         }
         
+        # Partial batch response: with ReportBatchItemFailures enabled on the
+        # event source mapping, SQS redelivers only the records that failed
+        if failed_message_ids is not None:
+            response['batchItemFailures'] = [{'itemIdentifier': message_id} for message_id in failed_message_ids]
+        
+        return response
+        
     except Exception as e:
-        logger.error(f"Error in emergency alerts: {str(e)}")
+        logger.error("Error in emergency alerts: %s", e)
         return {
             'statusCode': 500,
-            'body': json.dumps({
+            'body': encode_json({
                 'error': 'Emergency alerts failed',
                 'message': str(e)
             })
         }
+    
+    finally:
+        flush_emergency_metrics()
+
+def _handle_sqs(event, invoked_at):
+    """Handle an SQS trigger, returning the message IDs of records that failed"""
+    return process_emergency_events_bulk(event['Records'], invoked_at)
+
+def _handle_direct(event, invoked_at):
+    """Handle a direct invocation or API Gateway request"""
+    process_emergency_event(json.loads(event['body']) if 'body' in event else event, invoked_at)
+
+def build_emergency_context(emergency_data, invoked_at):
+    """Derive the shared per-event context, stamped with the event's own time if it has one"""
+    user_id = emergency_data.get('userId')
+    if not user_id:
+        raise ValueError("userId is required")
+    
+    return EmergencyContext(
+        now_iso=emergency_data.get('timestamp') or invoked_at,
+        user_id=user_id,
+        vitals=emergency_data.get('vitals', {})
+    )
 
-def process_emergency_event(record):
+def process_emergency_event(emergency_data, invoked_at):
     """Process individual emergency event"""
     try:
-        # Extract emergency data
-        if 'body' in record:
-            emergency_data = json.loads(record['body'])
-        else:
-            emergency_data = record
-        
         action = emergency_data.get('action')
-        user_id = emergency_data.get('userId')
-        
-        if not user_id:
-            raise ValueError("userId is required")
-        
-        if action == 'check_emergency':
-            return check_emergency_conditions(user_id, emergency_data)
-        elif action == 'send_emergency_alert':
-            return send_emergency_alert(user_id, emergency_data)
-        elif action == 'log_emergency':
-            return log_emergency_event(user_id, emergency_data)
-        elif action == 'get_emergency_history':
-            return get_emergency_history(user_id, emergency_data)
-        else:
+        ctx = build_emergency_context(emergency_data, invoked_at)
+        
+        handler = _ACTIONS.get(action)
+        if handler is None:
             raise ValueError(f"Unknown action: {action}")
         
+        return handler(ctx, emergency_data)
+        
     except Exception as e:
-        logger.error(f"Error processing emergency event: {str(e)}")
+        logger.error("Error processing emergency event: %s", e)
         raise
 
-def check_emergency_conditions(user_id, emergency_data):
+def process_emergency_events_bulk(records, invoked_at):
+    """Process a batch of SQS emergency records, sending every alert in one flush and returning the IDs of records that failed"""
+    pending_alerts = []
+    failed_message_ids = []
+    try:
+        for record in records:
+            # A malformed or failing record is set aside on its own, so it
+            # cannot hold back the alerts of the rest of the batch
+            try:
+                emergency_data = json.loads(record['body'])
+                
+                # Non-check actions keep the per-record path
+                if emergency_data.get('action') != 'check_emergency':
+                    process_emergency_event(emergency_data, invoked_at)
+                    continue
+                
+                ctx = build_emergency_context(emergency_data, invoked_at)
+                for condition in find_critical_conditions(ctx.vitals):
+                    pending_alerts.append((ctx.user_id, {
+                        'condition': condition,
+                        'vitals': ctx.vitals,
+                        'timestamp': ctx.now_iso
+                    }))
+            except Exception as e:
+                logger.error("Error processing emergency record %s: %s", record.get('messageId'), e)
+                failed_message_ids.append(record.get('messageId'))
+    
+    finally:
+        # Alerts collected so far go out whatever happened to other records
+        if pending_alerts:
+            send_emergency_alerts(pending_alerts)
+    
+    return failed_message_ids
+
+def check_emergency_conditions(ctx, emergency_data):
     """Check for emergency health conditions"""
     try:
-        vitals = emergency_data.get('vitals', {})
-        timestamp = emergency_data.get('timestamp', datetime.utcnow().isoformat())
-        
         # Check for critical conditions
-        critical_conditions = []
-        
-        # Heart rate emergency
-        heart_rate = vitals.get('heartRate')
-        if heart_rate:
-            if heart_rate < 30 or heart_rate > 220:
-                critical_conditions.append({
-                    'type': 'CRITICAL_HEART_RATE',
-                    'severity': 'CRITICAL',
-                    'value': heart_rate,
-                    'message': f'CRITICAL: Heart rate {heart_rate} bpm is life-threatening',
-                    'action_required': 'IMMEDIATE_MEDICAL_ATTENTION'
-                })
-            elif heart_rate < 40 or heart_rate > 180:
-                critical_conditions.append({
-                    'type': 'EMERGENCY_HEART_RATE',
-                    'severity': 'HIGH',
-                    'value': heart_rate,
-                    'message': f'EMERGENCY: Heart rate {heart_rate} bpm requires immediate attention',
-                    'action_required': 'URGENT_MEDICAL_CARE'
-                })
-        
-        # Blood pressure emergency
-        systolic = vitals.get('systolicBP')
-        diastolic = vitals.get('diastolicBP')
-        if systolic and diastolic:
-            if systolic > 200 or diastolic > 120:
-                critical_conditions.append({
-                    'type': 'CRITICAL_BLOOD_PRESSURE',
-                    'severity': 'CRITICAL',
-                    'value': f'{systolic}/{diastolic}',
-                    'message': f'CRITICAL: Blood pressure {systolic}/{diastolic} mmHg is life-threatening',
-                    'action_required': 'IMMEDIATE_MEDICAL_ATTENTION'
-                })
-            elif systolic > 180 or diastolic > 110:
-                critical_conditions.append({
-                    'type': 'EMERGENCY_BLOOD_PRESSURE',
-                    'severity': 'HIGH',
-                    'value': f'{systolic}/{diastolic}',
-                    'message': f'EMERGENCY: Blood pressure {systolic}/{diastolic} mmHg requires immediate attention',
-                    'action_required': 'URGENT_MEDICAL_CARE'
-                })
-        
-        # Temperature emergency
-        temperature = vitals.get('temperature')
-        if temperature:
-            if temperature < 90 or temperature > 107:
-                critical_conditions.append({
-                    'type': 'CRITICAL_TEMPERATURE',
-                    'severity': 'CRITICAL',
-                    'value': temperature,
-                    'message': f'CRITICAL: Temperature {temperature}°F is life-threatening',
-                    'action_required': 'IMMEDIATE_MEDICAL_ATTENTION'
-                })
-            elif temperature < 95 or temperature > 105:
-                critical_conditions.append({
-                    'type': 'EMERGENCY_TEMPERATURE',
-                    'severity': 'HIGH',
-                    'value': temperature,
-                    'message': f'EMERGENCY: Temperature {temperature}°F requires immediate attention',
-                    'action_required': 'URGENT_MEDICAL_CARE'
-                })
-        
-        # Oxygen saturation emergency
-        oxygen_sat = vitals.get('oxygenSaturation')
-        if oxygen_sat:
-            if oxygen_sat < 80:
-                critical_conditions.append({
-                    'type': 'CRITICAL_OXYGEN_SATURATION',
-                    'severity': 'CRITICAL',
-                    'value': oxygen_sat,
-                    'message': f'CRITICAL: Oxygen saturation {oxygen_sat}% is life-threatening',
-                    'action_required': 'IMMEDIATE_MEDICAL_ATTENTION'
-                })
-            elif oxygen_sat < 90:
-                critical_conditions.append({
-                    'type': 'EMERGENCY_OXYGEN_SATURATION',
-                    'severity': 'HIGH',
-                    'value': oxygen_sat,
-                    'message': f'EMERGENCY: Oxygen saturation {oxygen_sat}% requires immediate attention',
-                    'action_required': 'URGENT_MEDICAL_CARE'
-                })
-        
-        # Check for fall detection
-        if 'fallDetected' in vitals and vitals['fallDetected']:
-            critical_conditions.append({
-                'type': 'FALL_DETECTED',
-                'severity': 'HIGH',
-                'value': 'true',
-                'message': 'EMERGENCY: Fall detected - immediate assistance may be needed',
-                'action_required': 'CHECK_PATIENT_CONDITION'
-            })
+        critical_conditions = find_critical_conditions(ctx.vitals)
         
-        # Check for panic button
-        if 'panicButton' in vitals and vitals['panicButton']:
-            critical_conditions.append({
-                'type': 'PANIC_BUTTON_ACTIVATED',
-                'severity': 'CRITICAL',
-                'value': 'true',
-                'message': 'CRITICAL: Panic button activated - immediate assistance required',
-                'action_required': 'IMMEDIATE_EMERGENCY_RESPONSE'
-            })
-        
-        # If critical conditions found, send alerts
+        # If critical conditions found, send all alerts in one batch
         if critical_conditions:
-            for condition in critical_conditions:
-                send_emergency_alert(user_id, {
+            send_emergency_alerts([
+                (ctx.user_id, {
                     'condition': condition,
-                    'vitals': vitals,
-                    'timestamp': timestamp
+                    'vitals': ctx.vitals,
+                    'timestamp': ctx.now_iso
                 })
+                for condition in critical_conditions
+            ])
         
         return {
             'statusCode': 200,
-            'body': json.dumps({
-                'userId': user_id,
-                'timestamp': timestamp,
+            'body': encode_json({
+                'userId': ctx.user_id,
+                'timestamp': ctx.now_iso,
                 'criticalConditions': critical_conditions,
                 'emergencyDetected': len(critical_conditions) > 0
             })
         }
         
     except Exception as e:
-        logger.error(f"Error checking emergency conditions: {str(e)}")
+        logger.error("Error checking emergency conditions: %s", e)
         raise
 
-def send_emergency_alert(user_id, alert_data):
+def find_critical_conditions(vitals):
+    """Evaluate vitals against the emergency thresholds"""
+    critical_conditions = []
+    
+    # Panic button and fall detection first, so the most urgent alerts lead
+    # the first PublishBatch request
+    for key, condition_type, severity, message, action_required in FLAG_CONDITIONS:
+        if vitals.get(key):
+            critical_conditions.append({
+                'type': condition_type,
+                'severity': severity,
+                'value': 'true',
+                'message': message,
+                'action_required': action_required
+            })
+    
+    # Vital sign emergencies
+    for keys, critical_ranges, emergency_ranges, templates in VITAL_RULES:
+        values = [vitals.get(key) for key in keys]
+        if not all(values):
+            continue
+        
+        # Critical ranges sit outside emergency ranges, so the two
+        # checks sum to a severity index of 0, 1 or 2
+        level = (
+            any(not low <= v <= high for v, (low, high) in zip(values, critical_ranges)) +
+            any(not low <= v <= high for v, (low, high) in zip(values, emergency_ranges))
+        )
+        template = templates[level]
+        if template is None:
+            continue
+        
+        condition_type, severity, action_required, message = template
+        value = values[0] if len(values) == 1 else '/'.join(str(v) for v in values)
+        critical_conditions.append({
+            'type': condition_type,
+            'severity': severity,
+            'value': value,
+            'message': message % value,
+            'action_required': action_required
+        })
+    
+    return critical_conditions
+
+def send_emergency_alert(ctx, alert_data):
     """Send emergency alert via SNS"""
+    send_emergency_alerts([(ctx.user_id, {**alert_data, 'timestamp': ctx.now_iso})])
+
+def send_emergency_alerts(user_alerts):
+    """Send (user_id, alert_data) pairs via SNS using as few PublishBatch calls as possible"""
     try:
-        condition = alert_data.get('condition', {})
-        vitals = alert_data.get('vitals', {})
-        timestamp = alert_data.get('timestamp', datetime.utcnow().isoformat())
-        
-        # Create emergency alert message
-        alert_message = {
-            'userId': user_id,
-            'timestamp': timestamp,
-            'condition': condition,
-            'vitals': vitals,
-            'alertType': 'EMERGENCY_HEALTH_ALERT',
-            'severity': condition.get('severity', 'HIGH'),
-            'actionRequired': condition.get('action_required', 'URGENT_MEDICAL_CARE'),
-            'message': condition.get('message', 'Emergency health condition detected'),
-            'location': alert_data.get('location', 'Unknown'),
-            'contactInfo': alert_data.get('contactInfo', {})
-        }
-        
-        # Send to SNS topic
-        sns.publish(
-            TopicArn=ALERTS_TOPIC,
-            Message=json.dumps(alert_message),
-            Subject=f'🚨 EMERGENCY: {condition.get("type", "Health Alert")} - User {user_id}'
-        )
-        
-        # Send direct email notification
-        send_direct_email_notification(user_id, alert_message)
+        entries = []
+        sent_alerts = []
+        for index, (user_id, alert_data) in enumerate(user_alerts):
+            condition = alert_data.get('condition', {})
+            vitals = alert_data.get('vitals', {})
+            timestamp = alert_data['timestamp']
+            condition_type = condition.get('type')
+            severity = condition.get('severity', 'HIGH')
+            action_required = condition.get('action_required', 'URGENT_MEDICAL_CARE')
+            message = condition.get('message', 'Emergency health condition detected')
+            
+            # Create emergency alert message
+            alert_message = {
+                'userId': user_id,
+                'timestamp': timestamp,
+                'condition': condition,
+                'vitals': vitals,
+                'alertType': 'EMERGENCY_HEALTH_ALERT',
+                'severity': severity,
+                'actionRequired': action_required,
+                'message': message,
+                'location': alert_data.get('location', 'Unknown'),
+                'contactInfo': alert_data.get('contactInfo', {})
+            }
+            
+            entries.append({
+                'Id': f'alert-{index}',
+                'Message': encode_json(alert_message),
+                'Subject': f'🚨 EMERGENCY: {condition_type or "Health Alert"} - User {user_id}'
+            })
+            
+            # Direct email notification for critical emergencies rides in the same batch
+            if severity == 'CRITICAL':
+                entries.append(build_direct_email_notification(
+                    f'email-{index}', user_id, timestamp, condition_type,
+                    severity, action_required, message, vitals
+                ))
+            
+            sent_alerts.append((f'alert-{index}', user_id, timestamp, condition_type, severity, message, vitals))
         
-        # Log emergency event
-        log_emergency_event(user_id, {
-            'action': 'log_emergency',
-            'condition': condition,
-            'vitals': vitals,
-            'timestamp': timestamp,
-            'alertSent': True
-        })
+        # Send to SNS topic; a failed direct email is logged but not retried,
+        # while a failed alert fails the dispatch once the delivered alerts
+        # have been recorded
+        failed_ids = publish_alert_batch(entries)
         
-        # Update CloudWatch metrics
-        update_emergency_metrics(user_id, condition.get('type', 'UNKNOWN'))
+        for entry_id, user_id, timestamp, condition_type, severity, message, vitals in sent_alerts:
+            if entry_id in failed_ids:
+                continue
+            
+            # Log emergency event
+            logger.info("Emergency event logged: %s", {
+                'userId': user_id,
+                'timestamp': timestamp,
+                'conditionType': condition_type,
+                'severity': severity,
+                'message': message,
+                'vitals': vitals,
+                'alertSent': True
+            })
+            
+            # Update CloudWatch metrics
+            update_emergency_metrics(user_id, condition_type or 'UNKNOWN')
+            
+            logger.critical("Emergency alert sent for user %s: %s", user_id, condition_type)
         
-        logger.critical(f"Emergency alert sent for user {user_id}: {condition.get('type')}")
+        failed_alerts = sum(entry_id in failed_ids for entry_id, *_ in sent_alerts)
+        if failed_alerts:
+            raise RuntimeError(f"{failed_alerts} emergency alert message(s) failed to publish")
         
     except Exception as e:
-        logger.error(f"Error sending emergency alert: {str(e)}")
+        logger.error("Error sending emergency alert: %s", e)
         raise
 
-def send_direct_email_notification(user_id, alert_message):
-    """Send direct email notification for critical emergencies"""
-    try:
-        condition = alert_message.get('condition', {})
-        severity = condition.get('severity', 'HIGH')
-        
-        # Only send direct email for critical emergencies
-        if severity == 'CRITICAL':
-            email_subject = f"🚨 CRITICAL EMERGENCY - User {user_id}"
-            email_body = f"""
+def publish_alert_batch(entries):
+    """Publish alert entries to the alerts topic, 10 per PublishBatch request, returning the IDs that failed"""
+    chunks = [entries[start:start + SNS_BATCH_SIZE] for start in range(0, len(entries), SNS_BATCH_SIZE)]
+    
+    # Independent PublishBatch requests go out concurrently so dispatch time
+    # tracks the slowest request rather than their sum
+    if len(chunks) > 1:
+        responses = _executor.map(publish_alert_chunk, chunks)
+    else:
+        responses = map(publish_alert_chunk, chunks)
+    
+    failed_ids = set()
+    for response in responses:
+        for failure in response.get('Failed', []):
+            logger.error("Failed to publish alert %s: %s", failure.get('Id'), failure.get('Message'))
+            failed_ids.add(failure.get('Id'))
+    
+    return failed_ids
+
+def publish_alert_chunk(entries):
+    """Publish up to 10 alert entries in a single PublishBatch request"""
+    return sns.publish_batch(
+        TopicArn=ALERTS_TOPIC,
+        PublishBatchRequestEntries=entries
+    )
+
+def build_direct_email_notification(entry_id, user_id, timestamp, condition_type,
+                                    severity, action_required, message, vitals):
+    """Build the direct email notification entry for a critical emergency"""
+    email_subject = f"🚨 CRITICAL EMERGENCY - User {user_id}"
+    email_body = f"""
 CRITICAL HEALTH EMERGENCY DETECTED
 
 User ID: {user_id}
-Timestamp: {alert_message.get('timestamp')}
-Condition: {condition.get('type')}
+Timestamp: {timestamp}
+Condition: {condition_type}
 Severity: {severity}
-Action Required: {condition.get('action_required')}
+Action Required: {action_required}
 
-Message: {condition.get('message')}
+Message: {message}
 
 Vitals Data:
-{json.dumps(alert_message.get('vitals', {}), indent=2)}
+{json.dumps(vitals, indent=2, default=str)}
 
 IMMEDIATE ACTION REQUIRED:
 - Contact emergency services if necessary
@@ -296,19 +449,15 @@ IMMEDIATE ACTION REQUIRED:
 
 This is an automated alert from the Health Assistant System.
 """
-            
-            sns.publish(
-                TopicArn=ALERTS_TOPIC,
-                Message=email_body,
-                Subject=email_subject
-            )
-            
-            logger.critical(f"Direct email notification sent for critical emergency - User {user_id}")
-        
-    except Exception as e:
-        logger.error(f"Error sending direct email notification: {str(e)}")
+    
+    logger.critical("Direct email notification queued for critical emergency - User %s", user_id)
+    return {
+        'Id': entry_id,
+        'Message': email_body,
+        'Subject': email_subject
+    }
 
-def log_emergency_event(user_id, event_data):
+def log_emergency_event(ctx, event_data):
     """Log emergency event for tracking and analysis"""
     try:
         # This would typically store in a DynamoDB table for emergency events
@@ -316,71 +465,122 @@ def log_emergency_event(user_id, event_data):
         condition = event_data.get('condition', {})
         
         log_entry = {
-            'userId': user_id,
-            'timestamp': event_data.get('timestamp', datetime.utcnow().isoformat()),
+            'userId': ctx.user_id,
+            'timestamp': ctx.now_iso,
             'conditionType': condition.get('type'),
             'severity': condition.get('severity'),
             'message': condition.get('message'),
-            'vitals': event_data.get('vitals', {}),
+            'vitals': ctx.vitals,
             'alertSent': event_data.get('alertSent', False)
         }
         
-        logger.info(f"Emergency event logged: {json.dumps(log_entry)}")
+        logger.info("Emergency event logged: %s", log_entry)
         
         # Update CloudWatch metrics
-        update_emergency_metrics(user_id, condition.get('type', 'UNKNOWN'))
+        update_emergency_metrics(ctx.user_id, condition.get('type', 'UNKNOWN'))
         
     except Exception as e:
-        logger.error(f"Error logging emergency event: {str(e)}")
+        logger.error("Error logging emergency event: %s", e)
 
-def get_emergency_history(user_id, request_data):
+def get_dynamodb():
+    """Return the DynamoDB resource, creating it on first use"""
+    global dynamodb
+    if dynamodb is None:
+        dynamodb = boto3.resource('dynamodb', config=AWS_CLIENT_CONFIG)
+    return dynamodb
+
+def get_emergency_history(ctx, request_data):
     """Get emergency history for a user"""
     try:
         days = request_data.get('days', 30)
         
-        # This would typically query a DynamoDB table
-        # For now, we'll return a placeholder response
+        if EMERGENCIES_TABLE:
+            # Calculate time threshold
+            cutoff = (datetime.now(timezone.utc) - timedelta(days=int(days))).isoformat()
+            
+            # One paginated range query with a narrow projection, never
+            # per-event GetItem calls
+            paginator = get_dynamodb().meta.client.get_paginator('query')
+            events = []
+            for page in paginator.paginate(
+                TableName=EMERGENCIES_TABLE,
+                KeyConditionExpression=Key('userId').eq(ctx.user_id) & Key('timestamp').gte(cutoff),
+                ProjectionExpression=EMERGENCY_HISTORY_PROJECTION,
+                ExpressionAttributeNames=EMERGENCY_HISTORY_ATTRIBUTE_NAMES,
+                ScanIndexForward=False
+            ):
+                events.extend(page['Items'])
+            
+            return {
+                'statusCode': 200,
+                'body': encode_json({
+                    'userId': ctx.user_id,
+                    'days': days,
+                    'emergencies': events,
+                    'count': len(events)
+                })
+            }
+        
+        # Without an emergencies table there is nothing to query
         return {
             'statusCode': 200,
-            'body': json.dumps({
-                'userId': user_id,
+            'body': encode_json({
+                'userId': ctx.user_id,
                 'message': 'Emergency history retrieval not implemented',
                 'note': 'This would typically query a DynamoDB table for emergency events'
             })
         }
         
     except Exception as e:
-        logger.error(f"Error getting emergency history: {str(e)}")
+        logger.error("Error getting emergency history: %s", e)
         raise
 
 def update_emergency_metrics(user_id, condition_type):
-    """Update CloudWatch metrics for emergency events"""
+    """Record an emergency event for the end-of-invocation metrics flush"""
+    _metric_buffer[condition_type] += 1
+
+def flush_emergency_metrics():
+    """Emit buffered emergency counts to CloudWatch via Embedded Metric Format"""
     try:
-        cloudwatch.put_metric_data(
-            Namespace='HealthAssistant/Emergencies',
-            MetricData=[{
-                'MetricName': 'EmergencyEvent',
-                'Value': 1,
-                'Unit': 'Count',
-                'Dimensions': [
-                    {'Name': 'UserId', 'Value': user_id},
-                    {'Name': 'ConditionType', 'Value': condition_type}
-                ]
-            }]
-        )
+        if not _metric_buffer:
+            return
+        
+        timestamp = int(time.time() * 1000)
+        
+        # EMF must be written to stdout as a bare JSON line, not through the
+        # Lambda log formatter
+        for condition_type, count in _metric_buffer.items():
+            print(encode_json({
+                '_aws': {
+                    'Timestamp': timestamp,
+                    'CloudWatchMetrics': [{
+                        'Namespace': METRICS_NAMESPACE,
+                        'Dimensions': [['ConditionType']],
+                        'Metrics': [{'Name': 'EmergencyEvent', 'Unit': 'Count'}]
+                    }]
+                },
+                'ConditionType': condition_type,
+                'EmergencyEvent': count
+            }))
         
         # Also update overall emergency count
-        cloudwatch.put_metric_data(
-            Namespace='HealthAssistant/Emergencies',
-            MetricData=[{
-                'MetricName': 'TotalEmergencies',
-                'Value': 1,
-                'Unit': 'Count'
-            }]
-        )
+        print(encode_json({
+            '_aws': {
+                'Timestamp': timestamp,
+                'CloudWatchMetrics': [{
+                    'Namespace': METRICS_NAMESPACE,
+                    'Dimensions': [[]],
+                    'Metrics': [{'Name': 'TotalEmergencies', 'Unit': 'Count'}]
+                }]
+            },
+            'TotalEmergencies': sum(_metric_buffer.values())
+        }))
         
     except Exception as e:
-        logger.error(f"Error updating emergency metrics: {str(e)}")
+        logger.error("Error updating emergency metrics: %s", e)
+    
+    finally:
+        _metric_buffer.clear()
 
 def check_continuous_monitoring(user_id, vitals_data):
     """Check for continuous monitoring alerts"""
@@ -422,73 +622,80 @@ def check_continuous_monitoring(user_id, vitals_data):
         return sustained_alerts
         
     except Exception as e:
-        logger.error(f"Error checking continuous monitoring: {str(e)}")
+        logger.error("Error checking continuous monitoring: %s", e)
         return []
 
+@lru_cache(maxsize=1024)
 def create_emergency_contact_list(user_id):
-    """Create emergency contact list for a user"""
+    """Create emergency contact list for a user (cached per warm container, read-only)"""
     try:
         # This would typically retrieve from user profile
         # For now, return default contacts
-        return {
-            'primaryContact': {
+        return MappingProxyType({
+            'primaryContact': MappingProxyType({
                 'name': 'Emergency Contact',
                 'phone': '+1234567890',
                 'email': NOTIFICATION_EMAIL,
                 'relationship': 'Primary Emergency Contact'
-            },
-            'healthcareProvider': {
+            }),
+            'healthcareProvider': MappingProxyType({
                 'name': 'Primary Care Physician',
                 'phone': '+1234567891',
                 'email': 'doctor@example.com',
                 'relationship': 'Healthcare Provider'
-            },
-            'emergencyServices': {
+            }),
+            'emergencyServices': MappingProxyType({
                 'name': 'Emergency Services',
                 'phone': '911',
                 'email': None,
                 'relationship': 'Emergency Services'
-            }
-        }
+            })
+        })
         
     except Exception as e:
-        logger.error(f"Error creating emergency contact list: {str(e)}")
-        return {}
+        logger.error("Error creating emergency contact list: %s", e)
+        return MappingProxyType({})
 
 def validate_emergency_thresholds(vitals):
     """Validate emergency thresholds for vitals"""
     try:
-        thresholds = {
-            'heartRate': {'min': 30, 'max': 220, 'critical_min': 20, 'critical_max': 250},
-            'systolicBP': {'min': 70, 'max': 250, 'critical_min': 50, 'critical_max': 300},
-            'diastolicBP': {'min': 40, 'max': 150, 'critical_min': 30, 'critical_max': 200},
-            'temperature': {'min': 90, 'max': 110, 'critical_min': 85, 'critical_max': 115},
-            'oxygenSaturation': {'min': 70, 'max': 100, 'critical_min': 60, 'critical_max': 100}
-        }
-        
         violations = []
         
-        for vital, value in vitals.items():
-            if vital in thresholds and isinstance(value, (int, float)):
-                threshold = thresholds[vital]
-                
-                if value < threshold['critical_min'] or value > threshold['critical_max']:
-                    violations.append({
-                        'vital': vital,
-                        'value': value,
-                        'severity': 'CRITICAL',
-                        'message': f'{vital} value {value} is outside critical range'
-                    })
-                elif value < threshold['min'] or value > threshold['max']:
-                    violations.append({
-                        'vital': vital,
-                        'value': value,
-                        'severity': 'HIGH',
-                        'message': f'{vital} value {value} is outside normal range'
-                    })
+        for vital, critical_min, critical_max, normal_min, normal_max in VALIDATION_THRESHOLDS:
+            value = vitals.get(vital)
+            try:
+                reading = float(value)
+            except (TypeError, ValueError):
+                continue
+            
+            # Critical ranges contain normal ranges, so the two checks sum
+            # to a severity index of 0, 1 or 2
+            level = (
+                (reading < critical_min or reading > critical_max) +
+                (reading < normal_min or reading > normal_max)
+            )
+            tier = VALIDATION_TIERS[level]
+            if tier is None:
+                continue
+            
+            severity, bound = tier
+            violations.append({
+                'vital': vital,
+                'value': value,
+                'severity': severity,
+                'message': f'{vital} value {value} is outside {bound} range'
+            })
         
         return violations
         
     except Exception as e:
-        logger.error(f"Error validating emergency thresholds: {str(e)}")
+        logger.error("Error validating emergency thresholds: %s", e)
         return []
+
+# Action dispatch table for process_emergency_event
+_ACTIONS = {
+    'check_emergency': check_emergency_conditions,
+    'send_emergency_alert': send_emergency_alert,
+    'log_emergency': log_emergency_event,
+    'get_emergency_history': get_emergency_history
+}
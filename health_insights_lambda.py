@@ -1,31 +1,170 @@
 import json
 import boto3
+from boto3.dynamodb.types import TypeDeserializer
+from botocore.config import Config
 import os
 import logging
+from array import array
+from bisect import bisect_right
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import chain
 from decimal import Decimal
-import statistics
+import math
 import uuid
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Insights run in the background or behind the agent's 60s invoke, so reads can
+# afford a few retries; the profile prefetch worker and the handler thread
+# share the DynamoDB pool
+AWS_CLIENT_CONFIG = Config(
+    tcp_keepalive=True,
+    retries={'mode': 'adaptive', 'max_attempts': 3},
+    max_pool_connections=8
+)
+
 # Initialize AWS clients
-dynamodb = boto3.resource('dynamodb')
-cloudwatch = boto3.client('cloudwatch')
+dynamodb = boto3.resource('dynamodb', config=AWS_CLIENT_CONFIG)
+# Low-level client for vitals reads, so numbers can be decoded straight to float
+dynamodb_client = boto3.client('dynamodb', config=AWS_CLIENT_CONFIG)
+cloudwatch = boto3.client('cloudwatch', config=AWS_CLIENT_CONFIG)
 
 # Environment variables
 VITALS_TABLE = os.environ['VITALS_TABLE']
 PROFILES_TABLE = os.environ['PROFILES_TABLE']
 
+# Table handles, resolved once per container
+profiles_table = dynamodb.Table(PROFILES_TABLE)
+
+# Shared pool for overlapping independent reads; reused across warm invocations
+_executor = ThreadPoolExecutor(max_workers=4)
+
+class FloatDeserializer(TypeDeserializer):
+    """Deserialize DynamoDB numbers as floats instead of Decimals"""
+    def _deserialize_n(self, value):
+        return float(value)
+
+deserialize_vital = FloatDeserializer().deserialize
+
+# Vitals query page sizes: small first page, doubling up to the cap
+VITALS_FIRST_PAGE_LIMIT = 100
+VITALS_MAX_PAGE_LIMIT = 1000
+
+# Normal heart rate ranges by age: under 20, 20-39, 40-59, 60 and over
+HR_AGE_BUCKETS = (20, 40, 60)
+HR_NORMAL_RANGES = ((60, 100), (60, 95), (60, 90), (60, 85))
+
+# Insight text per band, indexed by how many band floors the average clears:
+# (severity, message template, recommendation)
+HEART_RATE_INSIGHTS = (
+    ('warning',
+     'Your average heart rate ({average:.1f} bpm) is below the normal range for your age ({low}-{high} bpm).',
+     'Consider consulting with your healthcare provider about your low heart rate.'),
+    ('info',
+     'Your average heart rate ({average:.1f} bpm) is within the normal range for your age.',
+     'Continue maintaining your current lifestyle habits.'),
+    ('warning',
+     'Your average heart rate ({average:.1f} bpm) is above the normal range for your age ({low}-{high} bpm).',
+     'Consider lifestyle changes like regular exercise, stress management, and consulting with your healthcare provider.'),
+)
+
+TEMPERATURE_INSIGHTS = (
+    ('warning',
+     'Your average temperature ({average:.1f}°F) is below normal (97-99°F).',
+     'Monitor for symptoms of hypothermia or other conditions. Consult with your healthcare provider if this persists.'),
+    ('info',
+     'Your average temperature ({average:.1f}°F) is within the normal range.',
+     'Your body temperature is normal. Continue monitoring for any changes.'),
+    ('warning',
+     'Your average temperature ({average:.1f}°F) is above normal (97-99°F).',
+     'Monitor for fever symptoms. Rest, stay hydrated, and consult with your healthcare provider if symptoms worsen.'),
+)
+
+OXYGEN_INSIGHTS = (
+    ('critical',
+     'Your average oxygen saturation ({average:.1f}%) is critically low (normal: 95-100%).',
+     'Seek immediate medical attention. Low oxygen saturation can be life-threatening.'),
+    ('warning',
+     'Your average oxygen saturation ({average:.1f}%) is below normal (95-100%).',
+     'Monitor your breathing and consult with your healthcare provider. Consider factors like altitude or respiratory conditions.'),
+    ('info',
+     'Your average oxygen saturation ({average:.1f}%) is within the normal range.',
+     'Your oxygen levels are healthy. Continue monitoring for any changes.'),
+)
+
+# Overall health status by score: a score at a floor belongs to the tier above
+HEALTH_STATUS_FLOORS = (60, 70, 80, 90)
+HEALTH_STATUS_LABELS = ('Critical', 'Poor', 'Fair', 'Good', 'Excellent')
+
+# Blood pressure categories: (category, severity, recommendation)
+BLOOD_PRESSURE_CATEGORIES = (
+    ('Normal', 'info',
+     'Your blood pressure is in the normal range. Continue maintaining a healthy lifestyle.'),
+    ('Elevated', 'warning',
+     'Your blood pressure is elevated. Consider lifestyle changes like reducing sodium intake and increasing physical activity.'),
+    ('High Blood Pressure Stage 1', 'warning',
+     'You have Stage 1 high blood pressure. Consult with your healthcare provider about lifestyle changes and possible medication.'),
+    ('High Blood Pressure Stage 2', 'critical',
+     'You have Stage 2 high blood pressure. Immediate consultation with your healthcare provider is recommended.'),
+)
+
+# Recommendations generate_recommendations can add, by the condition that triggers them
+RECOMMENDATIONS = {
+    'low_health_score': {
+        'type': 'general',
+        'priority': 'high',
+        'title': 'Overall Health Improvement',
+        'description': 'Your health metrics indicate areas for improvement. Consider consulting with your healthcare provider for a comprehensive health assessment.'
+    },
+    'high_heart_rate': {
+        'type': 'cardiovascular',
+        'priority': 'medium',
+        'title': 'Heart Rate Management',
+        'description': 'Your heart rate is elevated. Consider regular cardiovascular exercise, stress reduction techniques, and maintaining a healthy weight.'
+    },
+    'high_blood_pressure': {
+        'type': 'cardiovascular',
+        'priority': 'high',
+        'title': 'Blood Pressure Management',
+        'description': 'Your blood pressure is elevated. Focus on reducing sodium intake, regular exercise, weight management, and stress reduction.'
+    },
+    'fever': {
+        'type': 'general',
+        'priority': 'medium',
+        'title': 'Fever Management',
+        'description': 'You may have a fever. Rest, stay hydrated, and monitor your symptoms. Consult with your healthcare provider if symptoms persist.'
+    },
+    'low_oxygen': {
+        'type': 'respiratory',
+        'priority': 'high',
+        'title': 'Oxygen Level Monitoring',
+        'description': 'Your oxygen saturation is below normal. Monitor your breathing, avoid smoking, and consult with your healthcare provider.'
+    },
+}
+
+def json_default(value):
+    """Serialize DynamoDB Decimals as ints or floats"""
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+# Compact encoder shared by every response body, built once per container
+encode_json = json.JSONEncoder(separators=(',', ':'), default=json_default).encode
+
 def lambda_handler(event, context):
     """
     Health insights Lambda function for generating personalized
     health recommendations and insights
     """
     try:
-        logger.info(f"Processing health insights event: {json.dumps(event)}")
+        # Encoding the whole event is only worth it when debug logging is on
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Processing health insights event: %s", encode_json(event))
         
         # Parse the incoming event
         if 'Records' in event:
@@ -38,17 +177,17 @@ def lambda_handler(event, context):
         
         return {
             'statusCode': 200,
-            'body': json.dumps({
+            'body': encode_json({
                 'message': 'Health insights processed successfully',
                 'timestamp': datetime.utcnow().isoformat()
             })
         }
         
     except Exception as e:
-        logger.error(f"Error in health insights: {str(e)}")
+        logger.exception("Error in health insights")
         return {
             'statusCode': 500,
-            'body': json.dumps({
+            'body': encode_json({
                 'error': 'Health insights failed',
                 'message': str(e)
             })
@@ -80,58 +219,39 @@ def process_insights_request(record):
         else:
             raise ValueError(f"Unknown action: {action}")
         
-    except Exception as e:
-        logger.error(f"Error processing insights request: {str(e)}")
+    except Exception:
+        logger.exception("Error processing insights request")
         raise
 
 def generate_health_insights(user_id, request_data):
     """Generate comprehensive health insights for a user"""
     try:
-        # Get user profile
-        user_profile = get_user_profile(user_id)
-        
-        # Get recent vitals data
+        # Get recent vitals data; the profile is only needed if there is any
         days = request_data.get('days', 30)
         vitals_data = get_recent_vitals(user_id, days)
         
         if not vitals_data:
             return {
                 'statusCode': 200,
-                'body': json.dumps({
+                'body': encode_json({
                     'message': 'No health data available for insights',
                     'userId': user_id
                 })
             }
         
-        # Analyze vitals trends
+        # Analyze vitals trends as the remaining pages stream in, while the
+        # profile is fetched
+        profile_future = _executor.submit(get_user_profile, user_id)
         trends = analyze_vitals_trends(vitals_data)
+        user_profile = profile_future.result()
         
         # Generate insights based on trends and profile
         insights = []
-        
-        # Heart rate insights
-        if 'heartRate' in trends:
-            hr_insight = generate_heart_rate_insight(trends['heartRate'], user_profile)
-            if hr_insight:
-                insights.append(hr_insight)
-        
-        # Blood pressure insights
-        if 'systolicBP' in trends and 'diastolicBP' in trends:
-            bp_insight = generate_blood_pressure_insight(trends, user_profile)
-            if bp_insight:
-                insights.append(bp_insight)
-        
-        # Temperature insights
-        if 'temperature' in trends:
-            temp_insight = generate_temperature_insight(trends['temperature'], user_profile)
-            if temp_insight:
-                insights.append(temp_insight)
-        
-        # Oxygen saturation insights
-        if 'oxygenSaturation' in trends:
-            o2_insight = generate_oxygen_insight(trends['oxygenSaturation'], user_profile)
-            if o2_insight:
-                insights.append(o2_insight)
+        for keys, generate_insight in INSIGHT_GENERATORS:
+            if all(key in trends for key in keys):
+                insight = generate_insight(trends if len(keys) > 1 else trends[keys[0]], user_profile)
+                if insight:
+                    insights.append(insight)
         
         # Overall health score
         health_score = calculate_health_score(trends, user_profile)
@@ -139,9 +259,11 @@ def generate_health_insights(user_id, request_data):
         # Generate recommendations
         recommendations = generate_recommendations(trends, user_profile, health_score)
         
+        # One timestamp for both the response and the stored copy
+        analysis_date = datetime.utcnow().isoformat()
         result = {
             'userId': user_id,
-            'analysisDate': datetime.utcnow().isoformat(),
+            'analysisDate': analysis_date,
             'periodDays': days,
             'healthScore': health_score,
             'insights': insights,
@@ -150,40 +272,41 @@ def generate_health_insights(user_id, request_data):
         }
         
         # Store insights in user profile
-        store_insights(user_id, result)
+        store_insights(user_id, result, analysis_date)
         
         return {
             'statusCode': 200,
-            'body': json.dumps(result)
+            'body': encode_json(result)
         }
         
-    except Exception as e:
-        logger.error(f"Error generating health insights: {str(e)}")
+    except Exception:
+        logger.exception("Error generating health insights")
         raise
 
 def get_health_recommendations(user_id, request_data):
     """Get personalized health recommendations"""
     try:
-        user_profile = get_user_profile(user_id)
         days = request_data.get('days', 30)
         vitals_data = get_recent_vitals(user_id, days)
         
         if not vitals_data:
             return {
                 'statusCode': 200,
-                'body': json.dumps({
+                'body': encode_json({
                     'message': 'No health data available for recommendations',
                     'userId': user_id
                 })
             }
         
+        profile_future = _executor.submit(get_user_profile, user_id)
         trends = analyze_vitals_trends(vitals_data)
+        user_profile = profile_future.result()
         health_score = calculate_health_score(trends, user_profile)
         recommendations = generate_recommendations(trends, user_profile, health_score)
         
         return {
             'statusCode': 200,
-            'body': json.dumps({
+            'body': encode_json({
                 'userId': user_id,
                 'recommendations': recommendations,
                 'healthScore': health_score,
@@ -191,8 +314,8 @@ def get_health_recommendations(user_id, request_data):
             })
         }
         
-    except Exception as e:
-        logger.error(f"Error getting health recommendations: {str(e)}")
+    except Exception:
+        logger.exception("Error getting health recommendations")
         raise
 
 def analyze_health_trends(user_id, request_data):
@@ -204,7 +327,7 @@ def analyze_health_trends(user_id, request_data):
         if not vitals_data:
             return {
                 'statusCode': 200,
-                'body': json.dumps({
+                'body': encode_json({
                     'message': 'No health data available for trend analysis',
                     'userId': user_id
                 })
@@ -214,7 +337,7 @@ def analyze_health_trends(user_id, request_data):
         
         return {
             'statusCode': 200,
-            'body': json.dumps({
+            'body': encode_json({
                 'userId': user_id,
                 'trends': trends,
                 'analysisDate': datetime.utcnow().isoformat(),
@@ -222,31 +345,32 @@ def analyze_health_trends(user_id, request_data):
             })
         }
         
-    except Exception as e:
-        logger.error(f"Error analyzing health trends: {str(e)}")
+    except Exception:
+        logger.exception("Error analyzing health trends")
         raise
 
 def get_health_summary(user_id, request_data):
     """Get comprehensive health summary"""
     try:
-        user_profile = get_user_profile(user_id)
         days = request_data.get('days', 30)
         vitals_data = get_recent_vitals(user_id, days)
         
         if not vitals_data:
             return {
                 'statusCode': 200,
-                'body': json.dumps({
+                'body': encode_json({
                     'message': 'No health data available for summary',
                     'userId': user_id
                 })
             }
         
+        profile_future = _executor.submit(get_user_profile, user_id)
         trends = analyze_vitals_trends(vitals_data)
+        user_profile = profile_future.result()
         health_score = calculate_health_score(trends, user_profile)
         
         # Get recent insights
-        recent_insights = get_recent_insights(user_id, 7)
+        recent_insights = get_recent_insights(user_id, 7, user_profile)
         
         summary = {
             'userId': user_id,
@@ -268,93 +392,128 @@ def get_health_summary(user_id, request_data):
         
         return {
             'statusCode': 200,
-            'body': json.dumps(summary)
+            'body': encode_json(summary)
         }
         
-    except Exception as e:
-        logger.error(f"Error getting health summary: {str(e)}")
+    except Exception:
+        logger.exception("Error getting health summary")
         raise
 
 def get_user_profile(user_id):
     """Get user profile from DynamoDB"""
-    table = dynamodb.Table(PROFILES_TABLE)
-    
-    response = table.get_item(Key={'userId': user_id})
+    response = profiles_table.get_item(Key={'userId': user_id})
     return response.get('Item', {})
 
-def get_recent_vitals(user_id, days):
-    """Get recent vitals data for a user"""
-    table = dynamodb.Table(VITALS_TABLE)
-    
+def iter_recent_vitals(user_id, days, page_limit=VITALS_FIRST_PAGE_LIMIT):
+    """Yield recent vitals items for a user page by page, following pagination past the 1 MB page cap"""
     # Calculate time threshold
     threshold = datetime.utcnow() - timedelta(days=days)
     threshold_str = threshold.isoformat()
     
-    response = table.query(
-        KeyConditionExpression='userId = :userId AND #ts >= :threshold',
-        ExpressionAttributeNames={'#ts': 'timestamp'},
-        ExpressionAttributeValues={
-            ':userId': user_id,
-            ':threshold': threshold_str
+    query_args = {
+        'TableName': VITALS_TABLE,
+        'KeyConditionExpression': 'userId = :userId AND #ts >= :threshold',
+        'ProjectionExpression': 'vitals, #ts',
+        'ExpressionAttributeNames': {'#ts': 'timestamp'},
+        'ExpressionAttributeValues': {
+            ':userId': {'S': user_id},
+            ':threshold': {'S': threshold_str}
         },
-        ScanIndexForward=True
-    )
+        'ScanIndexForward': True
+    }
     
-    return response.get('Items', [])
+    # Start with a small page and grow it, so light users get one quick
+    # round trip and heavy users are not cut off
+    while True:
+        response = dynamodb_client.query(Limit=page_limit, **query_args)
+        for item in response.get('Items', []):
+            yield {key: deserialize_vital(value) for key, value in item.items()}
+        
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            return
+        
+        query_args['ExclusiveStartKey'] = last_key
+        page_limit = min(page_limit * 2, VITALS_MAX_PAGE_LIMIT)
+
+def get_recent_vitals(user_id, days):
+    """Stream recent vitals for a user, or None if there are none in the period"""
+    # Peek at the first item so callers can bail out early; the rest of the
+    # pages are fetched as the stream is consumed, without buffering items
+    vitals = iter_recent_vitals(user_id, days)
+    first_item = next(vitals, None)
+    if first_item is None:
+        return None
+    return chain((first_item,), vitals)
 
 def analyze_vitals_trends(vitals_data):
-    """Analyze trends in vitals data"""
+    """Analyze trends in vitals data, consuming it in a single pass"""
     trends = {}
     
-    # Group vitals by type
-    vitals_by_type = {}
+    # Group vitals by type as packed C doubles
+    vitals_by_type = defaultdict(lambda: array('d'))
     for item in vitals_data:
         vitals = item.get('vitals', {})
         for key, value in vitals.items():
-            if key not in vitals_by_type:
-                vitals_by_type[key] = []
-            if isinstance(value, Decimal):
-                vitals_by_type[key].append(float(value))
-            else:
-                vitals_by_type[key].append(value)
+            vitals_by_type[key].append(value)
     
     # Calculate statistics for each vital type
     for key, values in vitals_by_type.items():
         if values:
+            n = len(values)
+            mean, variance, v_min, v_max, slope = vital_stats(values)
+            ordered = sorted(values)
+            middle = n // 2
             trends[key] = {
-                'average': statistics.mean(values),
-                'median': statistics.median(values),
-                'min': min(values),
-                'max': max(values),
-                'count': len(values),
-                'std_dev': statistics.stdev(values) if len(values) > 1 else 0,
-                'trend': calculate_trend_direction(values)
+                'average': mean,
+                'median': ordered[middle] if n % 2 else (ordered[middle - 1] + ordered[middle]) / 2,
+                'min': v_min,
+                'max': v_max,
+                'count': n,
+                'std_dev': math.sqrt(variance) if n > 1 else 0,
+                'trend': classify_trend(slope)
             }
     
     return trends
 
+def vital_stats(values):
+    """Single-pass mean, sample variance, min, max and slope against sample index"""
+    # Welford updates for the mean/variance; for x = 0..n-1 the least-squares
+    # slope has the closed form 12 * sum((x - (n-1)/2) * y) / (n * (n^2 - 1)),
+    # so the whole series is read exactly once
+    size = len(values)
+    center = (size - 1) / 2
+    n = 0
+    mean = 0.0
+    m2 = 0.0
+    weighted = 0.0
+    v_min = v_max = values[0]
+    
+    for x, y in enumerate(values):
+        n += 1
+        dy = y - mean
+        mean += dy / n
+        m2 += dy * (y - mean)
+        weighted += (x - center) * y
+        
+        if y < v_min:
+            v_min = y
+        elif y > v_max:
+            v_max = y
+    
+    variance = m2 / (n - 1) if n > 1 else 0.0
+    slope = 12.0 * weighted / (n * (n * n - 1)) if n > 1 else 0.0
+    return mean, variance, v_min, v_max, slope
+
 def calculate_trend_direction(values):
     """Calculate trend direction (increasing, decreasing, stable)"""
     if len(values) < 2:
         return 'stable'
     
-    # Simple linear trend calculation
-    n = len(values)
-    x = list(range(n))
-    y = values
-    
-    # Calculate slope
-    x_mean = sum(x) / n
-    y_mean = sum(y) / n
-    
-    numerator = sum((x[i] - x_mean) * (y[i] - y_mean) for i in range(n))
-    denominator = sum((x[i] - x_mean) ** 2 for i in range(n))
-    
-    if denominator == 0:
-        return 'stable'
-    
-    slope = numerator / denominator
-    
+    return classify_trend(vital_stats(values)[4])
+
+def classify_trend(slope):
+    """Map a per-sample slope to a trend direction"""
     if slope > 0.1:
         return 'increasing'
     elif slope < -0.1:
@@ -362,6 +521,11 @@ def calculate_trend_direction(values):
     else:
         return 'stable'
 
+@lru_cache(maxsize=128)
+def normal_heart_rate_range(age):
+    """Normal heart rate range (bpm) for an age"""
+    return HR_NORMAL_RANGES[bisect_right(HR_AGE_BUCKETS, age)]
+
 def generate_heart_rate_insight(hr_trend, user_profile):
     """Generate heart rate insight"""
     age = user_profile.get('age', 30)
@@ -371,36 +535,15 @@ def generate_heart_rate_insight(hr_trend, user_profile):
         return None
     
     # Normal heart rate ranges by age
-    if age < 20:
-        normal_range = (60, 100)
-    elif age < 40:
-        normal_range = (60, 95)
-    elif age < 60:
-        normal_range = (60, 90)
-    else:
-        normal_range = (60, 85)
+    low, high = normal_heart_rate_range(age)
     
-    if avg_hr < normal_range[0]:
-        return {
-            'type': 'heart_rate',
-            'severity': 'warning',
-            'message': f'Your average heart rate ({avg_hr:.1f} bpm) is below the normal range for your age ({normal_range[0]}-{normal_range[1]} bpm).',
-            'recommendation': 'Consider consulting with your healthcare provider about your low heart rate.'
-        }
-    elif avg_hr > normal_range[1]:
-        return {
-            'type': 'heart_rate',
-            'severity': 'warning',
-            'message': f'Your average heart rate ({avg_hr:.1f} bpm) is above the normal range for your age ({normal_range[0]}-{normal_range[1]} bpm).',
-            'recommendation': 'Consider lifestyle changes like regular exercise, stress management, and consulting with your healthcare provider.'
-        }
-    else:
-        return {
-            'type': 'heart_rate',
-            'severity': 'info',
-            'message': f'Your average heart rate ({avg_hr:.1f} bpm) is within the normal range for your age.',
-            'recommendation': 'Continue maintaining your current lifestyle habits.'
-        }
+    severity, message, recommendation = HEART_RATE_INSIGHTS[(avg_hr >= low) + (avg_hr > high)]
+    return {
+        'type': 'heart_rate',
+        'severity': severity,
+        'message': message.format(average=avg_hr, low=low, high=high),
+        'recommendation': recommendation
+    }
 
 def generate_blood_pressure_insight(bp_trends, user_profile):
     """Generate blood pressure insight"""
@@ -412,21 +555,13 @@ def generate_blood_pressure_insight(bp_trends, user_profile):
     
     # Blood pressure categories
     if systolic_avg < 120 and diastolic_avg < 80:
-        category = 'Normal'
-        severity = 'info'
-        recommendation = 'Your blood pressure is in the normal range. Continue maintaining a healthy lifestyle.'
+        category, severity, recommendation = BLOOD_PRESSURE_CATEGORIES[0]
     elif systolic_avg < 130 and diastolic_avg < 80:
-        category = 'Elevated'
-        severity = 'warning'
-        recommendation = 'Your blood pressure is elevated. Consider lifestyle changes like reducing sodium intake and increasing physical activity.'
+        category, severity, recommendation = BLOOD_PRESSURE_CATEGORIES[1]
     elif systolic_avg < 140 or diastolic_avg < 90:
-        category = 'High Blood Pressure Stage 1'
-        severity = 'warning'
-        recommendation = 'You have Stage 1 high blood pressure. Consult with your healthcare provider about lifestyle changes and possible medication.'
+        category, severity, recommendation = BLOOD_PRESSURE_CATEGORIES[2]
     else:
-        category = 'High Blood Pressure Stage 2'
-        severity = 'critical'
-        recommendation = 'You have Stage 2 high blood pressure. Immediate consultation with your healthcare provider is recommended.'
+        category, severity, recommendation = BLOOD_PRESSURE_CATEGORIES[3]
     
     return {
         'type': 'blood_pressure',
@@ -442,27 +577,13 @@ def generate_temperature_insight(temp_trend, user_profile):
     if avg_temp == 0:
         return None
     
-    if avg_temp < 97.0:
-        return {
-            'type': 'temperature',
-            'severity': 'warning',
-            'message': f'Your average temperature ({avg_temp:.1f}°F) is below normal (97-99°F).',
-            'recommendation': 'Monitor for symptoms of hypothermia or other conditions. Consult with your healthcare provider if this persists.'
-        }
-    elif avg_temp > 100.4:
-        return {
-            'type': 'temperature',
-            'severity': 'warning',
-            'message': f'Your average temperature ({avg_temp:.1f}°F) is above normal (97-99°F).',
-            'recommendation': 'Monitor for fever symptoms. Rest, stay hydrated, and consult with your healthcare provider if symptoms worsen.'
-        }
-    else:
-        return {
-            'type': 'temperature',
-            'severity': 'info',
-            'message': f'Your average temperature ({avg_temp:.1f}°F) is within the normal range.',
-            'recommendation': 'Your body temperature is normal. Continue monitoring for any changes.'
-        }
+    severity, message, recommendation = TEMPERATURE_INSIGHTS[(avg_temp >= 97.0) + (avg_temp > 100.4)]
+    return {
+        'type': 'temperature',
+        'severity': severity,
+        'message': message.format(average=avg_temp),
+        'recommendation': recommendation
+    }
 
 def generate_oxygen_insight(o2_trend, user_profile):
     """Generate oxygen saturation insight"""
@@ -471,155 +592,104 @@ def generate_oxygen_insight(o2_trend, user_profile):
     if avg_o2 == 0:
         return None
     
-    if avg_o2 < 90:
-        return {
-            'type': 'oxygen_saturation',
-            'severity': 'critical',
-            'message': f'Your average oxygen saturation ({avg_o2:.1f}%) is critically low (normal: 95-100%).',
-            'recommendation': 'Seek immediate medical attention. Low oxygen saturation can be life-threatening.'
-        }
-    elif avg_o2 < 95:
-        return {
-            'type': 'oxygen_saturation',
-            'severity': 'warning',
-            'message': f'Your average oxygen saturation ({avg_o2:.1f}%) is below normal (95-100%).',
-            'recommendation': 'Monitor your breathing and consult with your healthcare provider. Consider factors like altitude or respiratory conditions.'
-        }
-    else:
-        return {
-            'type': 'oxygen_saturation',
-            'severity': 'info',
-            'message': f'Your average oxygen saturation ({avg_o2:.1f}%) is within the normal range.',
-            'recommendation': 'Your oxygen levels are healthy. Continue monitoring for any changes.'
-        }
+    severity, message, recommendation = OXYGEN_INSIGHTS[(avg_o2 >= 90) + (avg_o2 >= 95)]
+    return {
+        'type': 'oxygen_saturation',
+        'severity': severity,
+        'message': message.format(average=avg_o2),
+        'recommendation': recommendation
+    }
+
+# Insight generators in report order: (required trend keys, generator).
+# Single-vital generators get that vital's trend, blood pressure gets all trends
+INSIGHT_GENERATORS = (
+    (('heartRate',), generate_heart_rate_insight),
+    (('systolicBP', 'diastolicBP'), generate_blood_pressure_insight),
+    (('temperature',), generate_temperature_insight),
+    (('oxygenSaturation',), generate_oxygen_insight),
+)
+
+def trend_averages(trends):
+    """Heart rate, systolic, diastolic, temperature and oxygen averages; NaN when missing"""
+    # NaN fails every comparison, so a missing vital is neutral wherever it
+    # is checked; blood pressure only counts when both readings are present
+    missing = {'average': math.nan}
+    systolic = trends.get('systolicBP', missing)['average']
+    diastolic = trends.get('diastolicBP', missing)['average']
+    if math.isnan(systolic) or math.isnan(diastolic):
+        systolic = diastolic = math.nan
+    return (
+        trends.get('heartRate', missing)['average'],
+        systolic,
+        diastolic,
+        trends.get('temperature', missing)['average'],
+        trends.get('oxygenSaturation', missing)['average']
+    )
 
 def calculate_health_score(trends, user_profile):
     """Calculate overall health score (0-100)"""
-    score = 100.0
-    
-    # Heart rate score
-    if 'heartRate' in trends:
-        hr_avg = trends['heartRate']['average']
-        age = user_profile.get('age', 30)
-        
-        if age < 20:
-            normal_range = (60, 100)
-        elif age < 40:
-            normal_range = (60, 95)
-        elif age < 60:
-            normal_range = (60, 90)
-        else:
-            normal_range = (60, 85)
-        
-        if hr_avg < normal_range[0] or hr_avg > normal_range[1]:
-            score -= 15
-    
-    # Blood pressure score
-    if 'systolicBP' in trends and 'diastolicBP' in trends:
-        systolic = trends['systolicBP']['average']
-        diastolic = trends['diastolicBP']['average']
-        
-        if systolic >= 140 or diastolic >= 90:
-            score -= 20
-        elif systolic >= 130 or diastolic >= 80:
-            score -= 10
-    
-    # Temperature score
-    if 'temperature' in trends:
-        temp = trends['temperature']['average']
-        if temp < 97.0 or temp > 100.4:
-            score -= 10
-    
-    # Oxygen saturation score
-    if 'oxygenSaturation' in trends:
-        o2 = trends['oxygenSaturation']['average']
-        if o2 < 90:
-            score -= 25
-        elif o2 < 95:
-            score -= 15
+    hr_avg, systolic, diastolic, temp, o2 = trend_averages(trends)
+    low, high = normal_heart_rate_range(user_profile.get('age', 30))
+    
+    # Each penalty is a boolean times its weight; stage 2 blood pressure and
+    # critically low oxygen also satisfy the milder check, so those stack
+    # to 20 and 25 points
+    score = 100.0 - (
+        15 * (hr_avg < low or hr_avg > high)
+        + 10 * (systolic >= 130 or diastolic >= 80)
+        + 10 * (systolic >= 140 or diastolic >= 90)
+        + 10 * (temp < 97.0 or temp > 100.4)
+        + 15 * (o2 < 95)
+        + 10 * (o2 < 90)
+    )
     
     return max(0, min(100, score))
 
 def generate_recommendations(trends, user_profile, health_score):
     """Generate personalized health recommendations"""
     recommendations = []
+    hr_avg, systolic, diastolic, temp, o2 = trend_averages(trends)
     
     # General recommendations based on health score
     if health_score < 70:
-        recommendations.append({
-            'type': 'general',
-            'priority': 'high',
-            'title': 'Overall Health Improvement',
-            'description': 'Your health metrics indicate areas for improvement. Consider consulting with your healthcare provider for a comprehensive health assessment.'
-        })
+        recommendations.append(dict(RECOMMENDATIONS['low_health_score']))
     
-    # Heart rate recommendations
-    if 'heartRate' in trends:
-        hr_avg = trends['heartRate']['average']
-        if hr_avg > 100:
-            recommendations.append({
-                'type': 'cardiovascular',
-                'priority': 'medium',
-                'title': 'Heart Rate Management',
-                'description': 'Your heart rate is elevated. Consider regular cardiovascular exercise, stress reduction techniques, and maintaining a healthy weight.'
-            })
+    # Heart rate recommendations (missing vitals are NaN and never match)
+    if hr_avg > 100:
+        recommendations.append(dict(RECOMMENDATIONS['high_heart_rate']))
     
     # Blood pressure recommendations
-    if 'systolicBP' in trends and 'diastolicBP' in trends:
-        systolic = trends['systolicBP']['average']
-        diastolic = trends['diastolicBP']['average']
-        
-        if systolic >= 130 or diastolic >= 80:
-            recommendations.append({
-                'type': 'cardiovascular',
-                'priority': 'high',
-                'title': 'Blood Pressure Management',
-                'description': 'Your blood pressure is elevated. Focus on reducing sodium intake, regular exercise, weight management, and stress reduction.'
-            })
+    if systolic >= 130 or diastolic >= 80:
+        recommendations.append(dict(RECOMMENDATIONS['high_blood_pressure']))
     
     # Temperature recommendations
-    if 'temperature' in trends:
-        temp = trends['temperature']['average']
-        if temp > 100.4:
-            recommendations.append({
-                'type': 'general',
-                'priority': 'medium',
-                'title': 'Fever Management',
-                'description': 'You may have a fever. Rest, stay hydrated, and monitor your symptoms. Consult with your healthcare provider if symptoms persist.'
-            })
+    if temp > 100.4:
+        recommendations.append(dict(RECOMMENDATIONS['fever']))
     
     # Oxygen saturation recommendations
-    if 'oxygenSaturation' in trends:
-        o2 = trends['oxygenSaturation']['average']
-        if o2 < 95:
-            recommendations.append({
-                'type': 'respiratory',
-                'priority': 'high',
-                'title': 'Oxygen Level Monitoring',
-                'description': 'Your oxygen saturation is below normal. Monitor your breathing, avoid smoking, and consult with your healthcare provider.'
-            })
+    if o2 < 95:
+        recommendations.append(dict(RECOMMENDATIONS['low_oxygen']))
     
     return recommendations
 
-def store_insights(user_id, insights_data):
+def store_insights(user_id, insights_data, insights_date=None):
     """Store insights in user profile"""
-    table = dynamodb.Table(PROFILES_TABLE)
-    
-    # Get existing profile
-    response = table.get_item(Key={'userId': user_id})
-    profile = response.get('Item', {})
-    
-    # Update with new insights
-    profile['userId'] = user_id
-    profile['lastInsights'] = insights_data
-    profile['lastInsightsDate'] = datetime.utcnow().isoformat()
-    
-    # Store updated profile
-    table.put_item(Item=profile)
+    # Update only the insights attributes in place; DynamoDB rejects
+    # Python floats, so numbers are converted to Decimal on the way in
+    profiles_table.update_item(
+        Key={'userId': user_id},
+        UpdateExpression='SET lastInsights = :insights, lastInsightsDate = :date',
+        ExpressionAttributeValues={
+            ':insights': json.loads(encode_json(insights_data), parse_float=Decimal),
+            ':date': insights_date or datetime.utcnow().isoformat()
+        }
+    )
 
-def get_recent_insights(user_id, days):
-    """Get recent insights for a user"""
-    profile = get_user_profile(user_id)
+def get_recent_insights(user_id, days, profile=None):
+    """Get recent insights for a user, reusing an already-fetched profile if given"""
+    if profile is None:
+        profile = get_user_profile(user_id)
+    
     last_insights = profile.get('lastInsights', {})
     
     if not last_insights:
@@ -636,13 +706,4 @@ def get_recent_insights(user_id, days):
 
 def get_overall_health_status(health_score, trends):
     """Get overall health status based on score and trends"""
-    if health_score >= 90:
-        return 'Excellent'
-    elif health_score >= 80:
-        return 'Good'
-    elif health_score >= 70:
-        return 'Fair'
-    elif health_score >= 60:
-        return 'Poor'
-    else:
-        return 'Critical'
+    return HEALTH_STATUS_LABELS[bisect_right(HEALTH_STATUS_FLOORS, health_score)]
@@ -1,46 +1,157 @@
 import json
 import boto3
+from botocore.config import Config
 import os
 import logging
+from array import array
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
 from decimal import Decimal
+import math
 import uuid
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Vitals batches arrive from SQS, so a few adaptive retries ride out
+# throttling before the whole batch would be redelivered; the SNS pool must
+# hold all eight alert publish workers at once
+AWS_CLIENT_CONFIG = Config(
+    tcp_keepalive=True,
+    retries={'mode': 'adaptive', 'max_attempts': 3},
+    max_pool_connections=16
+)
+
 # Initialize AWS clients
-dynamodb = boto3.resource('dynamodb')
-sns = boto3.client('sns')
-cloudwatch = boto3.client('cloudwatch')
+dynamodb = boto3.resource('dynamodb', config=AWS_CLIENT_CONFIG)
+sns = boto3.client('sns', config=AWS_CLIENT_CONFIG)
+cloudwatch = boto3.client('cloudwatch', config=AWS_CLIENT_CONFIG)
+
+# Worker threads for overlapping SNS alert publishes, reused across warm
+# invocations; kept small to stay clear of SNS publish throttling
+_sns_executor = ThreadPoolExecutor(max_workers=8)
 
 # Environment variables
 VITALS_TABLE = os.environ['VITALS_TABLE']
 ALERTS_TOPIC = os.environ['ALERTS_TOPIC']
+PROFILES_TABLE = os.environ.get('PROFILES_TABLE')  # Optional: per-user vitals baselines
+
+# Table handles, resolved once per container
+vitals_table = dynamodb.Table(VITALS_TABLE)
+profiles_table = dynamodb.Table(PROFILES_TABLE) if PROFILES_TABLE else None
+
+# CloudWatch metrics published per vitals record: (vital key, metric name, unit)
+VITAL_METRICS = (
+    ('heartRate', 'HeartRate', 'Count'),
+    ('systolicBP', 'SystolicBP', 'Count'),
+    ('diastolicBP', 'DiastolicBP', 'Count'),
+    ('temperature', 'Temperature', 'None'),
+    ('oxygenSaturation', 'OxygenSaturation', 'Percent'),
+)
+
+# Anomaly rules: (vital keys, tiers from most to least severe). Each tier is
+# (anomaly type, (low, high) bounds per key, message template); a reading is
+# anomalous when any key falls strictly outside its bounds
+ANOMALY_RULES = (
+    (('heartRate',), (
+        ('CRITICAL_HEART_RATE', ((40, 200),), 'Critical heart rate detected: {value} bpm'),
+        ('WARNING_HEART_RATE', ((50, 150),), 'Abnormal heart rate: {value} bpm'),
+    )),
+    (('systolicBP', 'diastolicBP'), (
+        ('CRITICAL_BLOOD_PRESSURE', ((-math.inf, 180), (-math.inf, 110)), 'Critical blood pressure: {value} mmHg'),
+        ('WARNING_BLOOD_PRESSURE', ((-math.inf, 140), (-math.inf, 90)), 'High blood pressure: {value} mmHg'),
+    )),
+    (('temperature',), (
+        ('CRITICAL_TEMPERATURE', ((95, 104),), 'Critical temperature: {value}°F'),
+        ('WARNING_TEMPERATURE', ((97, 100.4),), 'Abnormal temperature: {value}°F'),
+    )),
+    (('oxygenSaturation',), (
+        ('CRITICAL_OXYGEN_SATURATION', ((90, math.inf),), 'Critical oxygen saturation: {value}%'),
+        ('WARNING_OXYGEN_SATURATION', ((95, math.inf),), 'Low oxygen saturation: {value}%'),
+    )),
+)
+
+# Per-user baseline checks: (vital key, anomaly type, label, unit, sigma floor).
+# A reading is flagged when it is more than BASELINE_WARNING_Z standard
+# deviations from the user's rolling mean and the fixed thresholds above did
+# not fire. Deviations are warnings only, so they never page; the floor keeps
+# a very steady history from turning ordinary variation into large z-scores
+BASELINE_VITALS = (
+    ('heartRate', 'WARNING_HEART_RATE_DEVIATION', 'Heart rate', ' bpm', 5.0),
+    ('systolicBP', 'WARNING_SYSTOLIC_BP_DEVIATION', 'Systolic blood pressure', ' mmHg', 5.0),
+    ('diastolicBP', 'WARNING_DIASTOLIC_BP_DEVIATION', 'Diastolic blood pressure', ' mmHg', 4.0),
+    ('temperature', 'WARNING_TEMPERATURE_DEVIATION', 'Temperature', '°F', 0.3),
+    ('oxygenSaturation', 'WARNING_OXYGEN_SATURATION_DEVIATION', 'Oxygen saturation', '%', 1.0),
+)
+BASELINE_WARNING_Z = 2.0
+BASELINE_MIN_SAMPLES = 30  # Readings a vital needs before it gets a baseline
+BASELINE_BATCH_SIZE = 100  # BatchGetItem key limit
+METRIC_BATCH_SIZE = 1000  # PutMetricData datapoint limit
+
+def json_default(value):
+    """Serialize DynamoDB Decimals as ints or floats"""
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+# Compact encoder for response bodies and alert messages
+encode_json = json.JSONEncoder(separators=(',', ':'), default=json_default).encode
 
 def lambda_handler(event, context):
     """
     Health monitoring Lambda function for real-time vitals processing
     and anomaly detection
     """
+    alerts = []
+    metric_data = []  # CloudWatch datapoints for every record, published once
     try:
-        logger.info(f"Processing health monitoring event: {json.dumps(event)}")
+        # Serializing the whole batch is only worth it when debug logging is on
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Processing health monitoring event: %s", encode_json(event))
+        
+        # One timestamp for every record in this invocation
+        now = datetime.utcnow()
+        now_iso = now.isoformat()
+        
+        # Baseline refresh for the listed users, on demand or on a schedule
+        if event.get('action') == 'refresh_baselines':
+            refreshed = sum(
+                update_user_baseline(user_id, event.get('days', 7)) is not None
+                for user_id in event.get('userIds', [])
+            )
+            
+            return {
+                'statusCode': 200,
+                'body': encode_json({
+                    'message': 'Vitals baselines refreshed',
+                    'refreshedUsers': refreshed,
+                    'timestamp': now_iso
+                })
+            }
         
         # Parse the incoming event
         if 'Records' in event:
-            # SQS/EventBridge trigger
-            for record in event['Records']:
-                process_health_data(record)
+            # SQS/EventBridge trigger; baselines for every user in the batch
+            # are fetched together, and vitals writes are buffered into
+            # BatchWriteItem requests of up to 25 items
+            batch = [extract_health_data(record) for record in event['Records']]
+            baselines = get_user_baselines({health_data.get('userId') for health_data in batch} - {None})
+            with vitals_table.batch_writer(overwrite_by_pkeys=['userId', 'timestamp']) as writer:
+                for health_data in batch:
+                    alerts.append(process_health_data(health_data, now, now_iso, baselines, writer, metric_data))
         else:
             # Direct API call
-            process_health_data(event)
+            health_data = extract_health_data(event)
+            baselines = get_user_baselines({health_data.get('userId')} - {None})
+            alerts.append(process_health_data(health_data, now, now_iso, baselines, metric_data=metric_data))
         
         return {
             'statusCode': 200,
-            'body': json.dumps({
+            'body': encode_json({
                 'message': 'Health monitoring processed successfully',
-                'timestamp': datetime.utcnow().isoformat()
+                'timestamp': now_iso
             })
         }
         
@@ -48,141 +159,178 @@ def lambda_handler(event, context):
         logger.error(f"Error in health monitoring: {str(e)}")
         return {
             'statusCode': 500,
-            'body': json.dumps({
+            'body': encode_json({
                 'error': 'Health monitoring failed',
                 'message': str(e)
             })
         }
+    finally:
+        # Publish the buffered metrics, then let queued alert publishes
+        # finish before the container is frozen
+        flush_cloudwatch_metrics(metric_data)
+        wait([alert for alert in alerts if alert])
+
+def extract_health_data(record):
+    """Extract health data from an SQS record or direct invocation"""
+    if 'body' in record:
+        return json.loads(record['body'])
+    return record
 
-def process_health_data(record):
-    """Process individual health data record"""
+def process_health_data(health_data, now, now_iso, baselines=None, writer=None, metric_data=None):
+    """Process individual health data record, returning the pending alert publish if any"""
     try:
-        # Extract health data
-        if 'body' in record:
-            health_data = json.loads(record['body'])
-        else:
-            health_data = record
-        
         user_id = health_data.get('userId')
         vitals = health_data.get('vitals', {})
-        timestamp = health_data.get('timestamp', datetime.utcnow().isoformat())
+        timestamp = health_data.get('timestamp', now_iso)
         
         if not user_id:
             raise ValueError("userId is required")
         
         # Store vitals in DynamoDB
-        store_vitals(user_id, vitals, timestamp)
+        store_vitals(user_id, vitals, timestamp, now_iso, writer)
         
         # Check for anomalies
-        anomalies = detect_anomalies(vitals)
+        anomalies = detect_anomalies(vitals, (baselines or {}).get(user_id))
         
+        alert = None
         if anomalies:
-            # Send alert for critical anomalies
-            send_health_alert(user_id, anomalies, vitals)
+            # Send alert for critical anomalies without blocking the record
+            alert = _sns_executor.submit(send_health_alert, user_id, anomalies, vitals, now_iso)
         
         # Update CloudWatch metrics
-        update_cloudwatch_metrics(user_id, vitals)
+        update_cloudwatch_metrics(user_id, vitals, now, metric_data)
         
-        logger.info(f"Processed health data for user {user_id}")
+        logger.info("Processed health data for user %s", user_id)
+        return alert
         
     except Exception as e:
         logger.error(f"Error processing health data: {str(e)}")
         raise
 
-def store_vitals(user_id, vitals, timestamp):
-    """Store vitals data in DynamoDB"""
-    table = dynamodb.Table(VITALS_TABLE)
+def store_vitals(user_id, vitals, timestamp, processed_at, writer=None):
+    """Store vitals data in DynamoDB, through a batch writer if one is given"""
+    table = writer or vitals_table
     
-    # Convert float values to Decimal for DynamoDB
-    vitals_decimal = {}
-    for key, value in vitals.items():
-        if isinstance(value, (int, float)):
-            vitals_decimal[key] = Decimal(str(value))
-        else:
-            vitals_decimal[key] = value
+    # Convert numbers to Decimal for DynamoDB; repr keeps the shortest
+    # round-tripping digits and ints convert exactly without a string
+    vitals_decimal = {
+        key: Decimal(repr(value)) if type(value) is float else Decimal(value) if type(value) is int else value
+        for key, value in vitals.items()
+    }
     
     item = {
         'userId': user_id,
         'timestamp': timestamp,
         'vitals': vitals_decimal,
-        'processedAt': datetime.utcnow().isoformat()
+        'processedAt': processed_at
     }
     
     table.put_item(Item=item)
     logger.info(f"Stored vitals for user {user_id} at {timestamp}")
 
-def detect_anomalies(vitals):
-    """Detect health anomalies based on vitals"""
+def detect_anomalies(vitals, baseline=None):
+    """Detect health anomalies based on vitals and, if given, the user's baseline"""
     anomalies = []
+    flagged = set()
     
-    # Heart rate anomalies
-    heart_rate = vitals.get('heartRate')
-    if heart_rate:
-        if heart_rate < 40 or heart_rate > 200:
-            anomalies.append({
-                'type': 'CRITICAL_HEART_RATE',
-                'value': heart_rate,
-                'message': f'Critical heart rate detected: {heart_rate} bpm'
-            })
-        elif heart_rate < 50 or heart_rate > 150:
-            anomalies.append({
-                'type': 'WARNING_HEART_RATE',
-                'value': heart_rate,
-                'message': f'Abnormal heart rate: {heart_rate} bpm'
-            })
+    for keys, tiers in ANOMALY_RULES:
+        readings = [vitals.get(key) for key in keys]
+        if not all(readings):
+            continue
+        
+        # Report only the most severe tier the readings fall into
+        for anomaly_type, bounds, message in tiers:
+            if any(reading < low or reading > high for reading, (low, high) in zip(readings, bounds)):
+                value = readings[0] if len(readings) == 1 else '/'.join(map(str, readings))
+                anomalies.append({
+                    'type': anomaly_type,
+                    'value': value,
+                    'message': message.format(value=value)
+                })
+                flagged.update(keys)
+                break
     
-    # Blood pressure anomalies
-    systolic = vitals.get('systolicBP')
-    diastolic = vitals.get('diastolicBP')
-    if systolic and diastolic:
-        if systolic > 180 or diastolic > 110:
-            anomalies.append({
-                'type': 'CRITICAL_BLOOD_PRESSURE',
-                'value': f'{systolic}/{diastolic}',
-                'message': f'Critical blood pressure: {systolic}/{diastolic} mmHg'
-            })
-        elif systolic > 140 or diastolic > 90:
+    # Fixed thresholds stay the safety floor; the baseline adds deviations
+    # that are unusual for this user even when they are in the normal range
+    if baseline:
+        for key, anomaly_type, label, unit, sigma_floor in BASELINE_VITALS:
+            value = vitals.get(key)
+            if not value or key in flagged or key not in baseline:
+                continue
+            
+            mu, sigma = baseline[key]
+            z = abs(value - mu) / max(sigma, sigma_floor)
+            if z <= BASELINE_WARNING_Z:
+                continue
+            
             anomalies.append({
-                'type': 'WARNING_BLOOD_PRESSURE',
-                'value': f'{systolic}/{diastolic}',
-                'message': f'High blood pressure: {systolic}/{diastolic} mmHg'
+                'type': anomaly_type,
+                'value': value,
+                'message': f'{label} of {value}{unit} is {z:.1f} standard deviations from your baseline'
             })
     
-    # Temperature anomalies
-    temperature = vitals.get('temperature')
-    if temperature:
-        if temperature < 95 or temperature > 104:
-            anomalies.append({
-                'type': 'CRITICAL_TEMPERATURE',
-                'value': temperature,
-                'message': f'Critical temperature: {temperature}°F'
-            })
-        elif temperature < 97 or temperature > 100.4:
-            anomalies.append({
-                'type': 'WARNING_TEMPERATURE',
-                'value': temperature,
-                'message': f'Abnormal temperature: {temperature}°F'
-            })
+    return anomalies
+
+def get_user_baselines(user_ids):
+    """Get vitals baselines for a set of users as {userId: {vital: (mu, sigma)}}"""
+    baselines = {}
+    if not profiles_table or not user_ids:
+        return baselines
     
-    # Oxygen saturation anomalies
-    oxygen_sat = vitals.get('oxygenSaturation')
-    if oxygen_sat:
-        if oxygen_sat < 90:
-            anomalies.append({
-                'type': 'CRITICAL_OXYGEN_SATURATION',
-                'value': oxygen_sat,
-                'message': f'Critical oxygen saturation: {oxygen_sat}%'
-            })
-        elif oxygen_sat < 95:
-            anomalies.append({
-                'type': 'WARNING_OXYGEN_SATURATION',
-                'value': oxygen_sat,
-                'message': f'Low oxygen saturation: {oxygen_sat}%'
-            })
+    try:
+        keys = [{'userId': user_id} for user_id in user_ids]
+        for start in range(0, len(keys), BASELINE_BATCH_SIZE):
+            request = {
+                PROFILES_TABLE: {
+                    'Keys': keys[start:start + BASELINE_BATCH_SIZE],
+                    'ProjectionExpression': 'userId, vitalsBaseline'
+                }
+            }
+            
+            # Retry whatever DynamoDB could not return in one go
+            while request:
+                response = dynamodb.batch_get_item(RequestItems=request)
+                for profile in response.get('Responses', {}).get(PROFILES_TABLE, []):
+                    baseline = profile.get('vitalsBaseline')
+                    if baseline:
+                        baselines[profile['userId']] = {
+                            key: (float(stats['mu']), float(stats['sigma']))
+                            for key, stats in baseline.items()
+                        }
+                request = response.get('UnprocessedKeys')
+        
+    except Exception as e:
+        # Baselines only refine detection; the fixed thresholds still apply
+        logger.error(f"Error getting user baselines: {str(e)}")
     
-    return anomalies
+    return baselines
 
-def send_health_alert(user_id, anomalies, vitals):
+def update_user_baseline(user_id, days=7):
+    """Recompute a user's vitals baseline from recent trends and store it on their profile, returning None if skipped"""
+    if not profiles_table:
+        logger.warning(f"PROFILES_TABLE is not set; skipping baseline update for user {user_id}")
+        return None
+    
+    trends = calculate_health_trends(user_id, days)
+    baseline = {
+        key: {'mu': Decimal(str(trend['average'])), 'sigma': Decimal(str(trend['std_dev']))}
+        for key, trend in trends.items()
+        if trend['count'] >= BASELINE_MIN_SAMPLES
+    }
+    
+    profiles_table.update_item(
+        Key={'userId': user_id},
+        UpdateExpression='SET vitalsBaseline = :baseline, vitalsBaselineDate = :date',
+        ExpressionAttributeValues={
+            ':baseline': baseline,
+            ':date': datetime.utcnow().isoformat()
+        }
+    )
+    
+    logger.info(f"Updated vitals baseline for user {user_id}")
+    return baseline
+
+def send_health_alert(user_id, anomalies, vitals, timestamp):
     """Send health alert via SNS"""
     try:
         critical_anomalies = [a for a in anomalies if a['type'].startswith('CRITICAL')]
@@ -190,7 +338,7 @@ def send_health_alert(user_id, anomalies, vitals):
         if critical_anomalies:
             alert_message = {
                 'userId': user_id,
-                'timestamp': datetime.utcnow().isoformat(),
+                'timestamp': timestamp,
                 'severity': 'CRITICAL',
                 'anomalies': critical_anomalies,
                 'vitals': vitals,
@@ -199,7 +347,7 @@ def send_health_alert(user_id, anomalies, vitals):
             
             sns.publish(
                 TopicArn=ALERTS_TOPIC,
-                Message=json.dumps(alert_message),
+                Message=encode_json(alert_message),
                 Subject=f'CRITICAL: Health Alert for User {user_id}'
             )
             
@@ -208,87 +356,54 @@ def send_health_alert(user_id, anomalies, vitals):
     except Exception as e:
         logger.error(f"Error sending health alert: {str(e)}")
 
-def update_cloudwatch_metrics(user_id, vitals):
-    """Update CloudWatch metrics for monitoring"""
+def update_cloudwatch_metrics(user_id, vitals, timestamp, metric_data=None):
+    """Update CloudWatch metrics, appending to metric_data for a later flush if given"""
     try:
-        metrics = []
-        
-        # Heart rate metric
-        if 'heartRate' in vitals:
-            metrics.append({
-                'MetricName': 'HeartRate',
-                'Value': vitals['heartRate'],
-                'Unit': 'Count',
-                'Dimensions': [
-                    {'Name': 'UserId', 'Value': user_id}
-                ]
-            })
-        
-        # Blood pressure metrics
-        if 'systolicBP' in vitals:
-            metrics.append({
-                'MetricName': 'SystolicBP',
-                'Value': vitals['systolicBP'],
-                'Unit': 'Count',
-                'Dimensions': [
-                    {'Name': 'UserId', 'Value': user_id}
-                ]
-            })
-        
-        if 'diastolicBP' in vitals:
-            metrics.append({
-                'MetricName': 'DiastolicBP',
-                'Value': vitals['diastolicBP'],
-                'Unit': 'Count',
-                'Dimensions': [
-                    {'Name': 'UserId', 'Value': user_id}
-                ]
-            })
+        # One dimensions list shared by every datapoint for this user
+        dimensions = [{'Name': 'UserId', 'Value': user_id}]
+        metrics = [
+            {
+                'MetricName': metric_name,
+                'Value': vitals[key],
+                'Unit': unit,
+                'Timestamp': timestamp,
+                'Dimensions': dimensions
+            }
+            for key, metric_name, unit in VITAL_METRICS
+            if key in vitals
+        ]
         
-        # Temperature metric
-        if 'temperature' in vitals:
-            metrics.append({
-                'MetricName': 'Temperature',
-                'Value': vitals['temperature'],
-                'Unit': 'None',
-                'Dimensions': [
-                    {'Name': 'UserId', 'Value': user_id}
-                ]
-            })
+        if metric_data is None:
+            flush_cloudwatch_metrics(metrics)
+        else:
+            metric_data.extend(metrics)
         
-        # Oxygen saturation metric
-        if 'oxygenSaturation' in vitals:
-            metrics.append({
-                'MetricName': 'OxygenSaturation',
-                'Value': vitals['oxygenSaturation'],
-                'Unit': 'Percent',
-                'Dimensions': [
-                    {'Name': 'UserId', 'Value': user_id}
-                ]
-            })
+        logger.info(f"Updated CloudWatch metrics for user {user_id}")
         
-        # Send metrics to CloudWatch
-        for metric in metrics:
+    except Exception as e:
+        logger.error(f"Error updating CloudWatch metrics: {str(e)}")
+
+def flush_cloudwatch_metrics(metric_data):
+    """Publish buffered datapoints in as few PutMetricData requests as possible"""
+    try:
+        for start in range(0, len(metric_data), METRIC_BATCH_SIZE):
             cloudwatch.put_metric_data(
                 Namespace='HealthAssistant/Vitals',
-                MetricData=[metric]
+                MetricData=metric_data[start:start + METRIC_BATCH_SIZE]
             )
         
-        logger.info(f"Updated CloudWatch metrics for user {user_id}")
-        
     except Exception as e:
-        logger.error(f"Error updating CloudWatch metrics: {str(e)}")
+        logger.error(f"Error publishing CloudWatch metrics: {str(e)}")
 
 def get_recent_vitals(user_id, hours=24):
-    """Get recent vitals for a user"""
-    table = dynamodb.Table(VITALS_TABLE)
-    
+    """Get the timestamp and vitals of a user's most recent readings"""
     # Calculate time threshold
     threshold = datetime.utcnow() - timedelta(hours=hours)
     threshold_str = threshold.isoformat()
     
-    response = table.query(
+    response = vitals_table.query(
         KeyConditionExpression='userId = :userId AND #ts >= :threshold',
+        ProjectionExpression='#ts, vitals',
         ExpressionAttributeNames={'#ts': 'timestamp'},
         ExpressionAttributeValues={
             ':userId': user_id,
@@ -300,51 +415,85 @@ def get_recent_vitals(user_id, hours=24):
     
     return response.get('Items', [])
 
+def iter_vitals_since(user_id, threshold_str):
+    """Yield a user's vitals maps from threshold_str onwards, oldest first, across every result page"""
+    # Only the vitals map is read, so userId and processedAt are not
+    # transferred for every row
+    query_args = {
+        'KeyConditionExpression': 'userId = :userId AND #ts >= :threshold',
+        'ProjectionExpression': 'vitals',
+        'ExpressionAttributeNames': {'#ts': 'timestamp'},
+        'ExpressionAttributeValues': {
+            ':userId': user_id,
+            ':threshold': threshold_str
+        },
+        'ScanIndexForward': True
+    }
+    
+    while True:
+        response = vitals_table.query(**query_args)
+        for item in response.get('Items', []):
+            yield item.get('vitals', {})
+        
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            return
+        
+        query_args['ExclusiveStartKey'] = last_key
+
 def calculate_health_trends(user_id, days=7):
     """Calculate health trends over specified days"""
-    table = dynamodb.Table(VITALS_TABLE)
-    
     # Calculate time threshold
     threshold = datetime.utcnow() - timedelta(days=days)
     threshold_str = threshold.isoformat()
     
-    response = table.query(
-        KeyConditionExpression='userId = :userId AND #ts >= :threshold',
-        ExpressionAttributeNames={'#ts': 'timestamp'},
-        ExpressionAttributeValues={
-            ':userId': user_id,
-            ':threshold': threshold_str
-        },
-        ScanIndexForward=True
-    )
-    
-    vitals_list = response.get('Items', [])
-    
-    if not vitals_list:
-        return {}
-    
-    # Calculate averages and trends
+    # Group vitals by type as packed C doubles (Decimals convert on append),
+    # streaming each page instead of holding the raw items
     trends = {}
-    vitals_by_type = {}
+    vitals_by_type = defaultdict(lambda: array('d'))
     
-    for item in vitals_list:
-        vitals = item.get('vitals', {})
+    for vitals in iter_vitals_since(user_id, threshold_str):
         for key, value in vitals.items():
-            if key not in vitals_by_type:
-                vitals_by_type[key] = []
-            if isinstance(value, Decimal):
-                vitals_by_type[key].append(float(value))
-            else:
-                vitals_by_type[key].append(value)
+            vitals_by_type[key].append(value)
     
+    # Calculate averages and trends
     for key, values in vitals_by_type.items():
         if values:
+            average, variance, v_min, v_max, slope = series_stats(values)
             trends[key] = {
-                'average': sum(values) / len(values),
-                'min': min(values),
-                'max': max(values),
+                'average': average,
+                'min': v_min,
+                'max': v_max,
                 'count': len(values),
-                'trend': 'stable'  # Could implement trend calculation
+                'std_dev': math.sqrt(variance),
+                'trend': 'increasing' if slope > 0.1 else 'decreasing' if slope < -0.1 else 'stable'
             }
     
     return trends
+
+def series_stats(values):
+    """Single-pass mean, sample variance, min, max and least-squares slope against sample index"""
+    # Welford updates for the mean/variance; for x = 0..n-1 the slope has the
+    # closed form 12 * sum((x - (n-1)/2) * y) / (n * (n^2 - 1)), so no second
+    # pass is needed
+    n = len(values)
+    center = (n - 1) / 2
+    mean = 0.0
+    m2 = 0.0
+    weighted = 0.0
+    v_min = v_max = values[0]
+    
+    for x, y in enumerate(values):
+        dy = y - mean
+        mean += dy / (x + 1)
+        m2 += dy * (y - mean)
+        weighted += (x - center) * y
+        
+        if y < v_min:
+            v_min = y
+        elif y > v_max:
+            v_max = y
+    
+    variance = m2 / (n - 1) if n > 1 else 0.0
+    slope = 12.0 * weighted / (n * (n * n - 1)) if n > 1 else 0.0
+    return mean, variance, v_min, v_max, slope
@@ -1,47 +1,103 @@
 import json
 import boto3
+from boto3.dynamodb.conditions import Key
+from botocore.config import Config
 import os
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 import uuid
 import re
+import time
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Medication calls run one at a time on the handler thread, so botocore's
+# default pool is enough; retries cover the tables' low provisioned capacity
+AWS_CLIENT_CONFIG = Config(
+    tcp_keepalive=True,
+    retries={'mode': 'adaptive', 'max_attempts': 3}
+)
+
 # Initialize AWS clients
-dynamodb = boto3.resource('dynamodb')
-sns = boto3.client('sns')
-cloudwatch = boto3.client('cloudwatch')
+dynamodb = boto3.resource('dynamodb', config=AWS_CLIENT_CONFIG)
+sns = boto3.client('sns', config=AWS_CLIENT_CONFIG)
+cloudwatch = boto3.client('cloudwatch', config=AWS_CLIENT_CONFIG)
 
 # Environment variables
 MEDICATIONS_TABLE = os.environ['MEDICATIONS_TABLE']
 REMINDERS_TOPIC = os.environ['REMINDERS_TOPIC']
 
+# Table handle, resolved once per container
+medications_table = dynamodb.Table(MEDICATIONS_TABLE)
+
+# Accepted frequency formats, compiled once as a single alternation
+FREQUENCY_PATTERN = re.compile(
+    r'\d+x\s+daily'
+    r'|\d+\s+times\s+daily'
+    r'|every\s+\d+\s+hours'
+    r'|once\s+daily'
+    r'|twice\s+daily'
+    r'|three\s+times\s+daily'
+    r'|as\s+needed'
+    r'|prn'
+)
+HOURS_PATTERN = re.compile(r'(\d+)')
+
+# BatchGetItem key limit, for prefetching medications touched by a batch
+MEDICATION_BATCH_SIZE = 100
+
+# Backoff before re-requesting keys BatchGetItem left unprocessed, in seconds;
+# doubled on every retry up to the cap
+UNPROCESSED_RETRY_BASE_DELAY = 0.05
+UNPROCESSED_RETRY_MAX_DELAY = 1.0
+
+# Sparse index over medications by status and when the next dose is due,
+# so the reminder sweep only reads medications that are coming due
+REMINDER_INDEX = 'StatusNextDoseIndex'
+REMINDER_LEAD_TIME = timedelta(minutes=15)
+
+def json_default(value):
+    """Serialize DynamoDB Decimals as ints or floats"""
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+# Compact encoder for response bodies and reminder messages
+encode_json = json.JSONEncoder(separators=(',', ':'), default=json_default).encode
+
 def lambda_handler(event, context):
     """
     Medication management Lambda function for tracking medications,
     scheduling reminders, and monitoring adherence
     """
     try:
-        logger.info(f"Processing medication management event: {json.dumps(event)}")
+        # Serializing the whole batch is only worth it when debug logging is on
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Processing medication management event: %s", encode_json(event))
+        
+        # One timestamp for every record in this invocation
+        now_iso = datetime.utcnow().isoformat()
         
         # Parse the incoming event
         if 'Records' in event:
-            # SQS/EventBridge trigger
-            for record in event['Records']:
-                process_medication_event(record)
+            # SQS/EventBridge trigger; medications the batch updates are read
+            # up front in BatchGetItem requests instead of one get_item each
+            batch = [extract_medication_data(record) for record in event['Records']]
+            prefetched = get_medications_batch(prefetchable_keys(batch))
+            for medication_data in batch:
+                process_medication_event(medication_data, now_iso, prefetched)
         else:
             # Direct API call
-            process_medication_event(event)
+            process_medication_event(extract_medication_data(event), now_iso)
         
         return {
             'statusCode': 200,
-            'body': json.dumps({
+            'body': encode_json({
                 'message': 'Medication management processed successfully',
-                'timestamp': datetime.utcnow().isoformat()
+                'timestamp': now_iso
             })
         }
         
@@ -49,57 +105,65 @@ def lambda_handler(event, context):
         logger.error(f"Error in medication management: {str(e)}")
         return {
             'statusCode': 500,
-            'body': json.dumps({
+            'body': encode_json({
                 'error': 'Medication management failed',
                 'message': str(e)
             })
         }
 
-def process_medication_event(record):
+def prefetchable_keys(batch):
+    """Keys of medications whose first record in the batch is an update"""
+    # A prefetched copy is only current if no earlier record in the batch
+    # added, changed, dosed or removed that medication; later records for the
+    # same medication read it fresh
+    keys = set()
+    touched = set()
+    for medication_data in batch:
+        key = (medication_data.get('userId'), medication_data.get('medicationId'))
+        if not all(key) or key in touched:
+            continue
+        touched.add(key)
+        if medication_data.get('action') == 'update_medication':
+            keys.add(key)
+    
+    return keys
+
+def extract_medication_data(record):
+    """Extract medication data from an SQS record or direct invocation"""
+    if 'body' in record:
+        return json.loads(record['body'])
+    return record
+
+def process_medication_event(medication_data, now_iso, prefetched=None):
     """Process individual medication event"""
     try:
-        # Extract medication data
-        if 'body' in record:
-            medication_data = json.loads(record['body'])
-        else:
-            medication_data = record
-        
         action = medication_data.get('action')
         user_id = medication_data.get('userId')
         
         if not user_id:
             raise ValueError("userId is required")
         
-        if action == 'add_medication':
-            add_medication(user_id, medication_data)
-        elif action == 'update_medication':
-            update_medication(user_id, medication_data)
-        elif action == 'remove_medication':
-            remove_medication(user_id, medication_data)
-        elif action == 'log_dose':
-            log_medication_dose(user_id, medication_data)
-        elif action == 'check_reminders':
-            check_medication_reminders()
-        elif action == 'get_medications':
-            return get_user_medications(user_id)
-        else:
+        handler = _ACTIONS.get(action)
+        if handler is None:
             raise ValueError(f"Unknown action: {action}")
         
-        logger.info(f"Processed medication action '{action}' for user {user_id}")
+        result = handler(user_id, medication_data, now_iso, prefetched)
+        
+        logger.info("Processed medication action '%s' for user %s", action, user_id)
+        return result
         
     except Exception as e:
         logger.error(f"Error processing medication event: {str(e)}")
         raise
 
-def add_medication(user_id, medication_data):
+def add_medication(user_id, medication_data, now_iso):
     """Add a new medication for a user"""
-    table = dynamodb.Table(MEDICATIONS_TABLE)
-    
-    medication_id = medication_data.get('medicationId', str(uuid.uuid4()))
+    # Generate an ID only when none is supplied; hex drops the four dashes
+    medication_id = medication_data.get('medicationId') or uuid.uuid4().hex
     medication_name = medication_data.get('medicationName')
     dosage = medication_data.get('dosage')
     frequency = medication_data.get('frequency')
-    start_date = medication_data.get('startDate', datetime.utcnow().isoformat())
+    start_date = medication_data.get('startDate', now_iso)
     end_date = medication_data.get('endDate')
     instructions = medication_data.get('instructions', '')
     
@@ -110,50 +174,57 @@ def add_medication(user_id, medication_data):
     if not validate_frequency(frequency):
         raise ValueError("Invalid frequency format. Use format like '2x daily', 'every 8 hours', etc.")
     
+    created_at = now_iso
     item = {
         'userId': user_id,
         'medicationId': medication_id,
         'medicationName': medication_name,
         'dosage': dosage,
         'frequency': frequency,
+        # Parsed once here so logging a dose needs no frequency parsing
+        'doseIntervalSeconds': dose_interval(frequency),
         'startDate': start_date,
         'endDate': end_date,
         'instructions': instructions,
         'status': 'active',
-        'createdAt': datetime.utcnow().isoformat(),
+        'createdAt': created_at,
         'lastTaken': None,
+        # Never taken, so the first reminder is due now
+        'reminderWindowStart': created_at,
+        'nextDoseDueAt': created_at,
         'adherenceRate': 0.0,
         'totalDoses': 0,
         'missedDoses': 0
     }
     
-    table.put_item(Item=item)
+    medications_table.put_item(Item=item)
     logger.info(f"Added medication {medication_name} for user {user_id}")
     
     # Update CloudWatch metrics
     update_medication_metrics(user_id, 'medication_added')
 
-def update_medication(user_id, medication_data):
-    """Update an existing medication"""
-    table = dynamodb.Table(MEDICATIONS_TABLE)
-    
+def update_medication(user_id, medication_data, now_iso, prefetched=None):
+    """Update an existing medication, using a batch-prefetched copy if there is one"""
     medication_id = medication_data.get('medicationId')
     if not medication_id:
         raise ValueError("medicationId is required for update")
     
-    # Get existing medication
-    response = table.get_item(
-        Key={'userId': user_id, 'medicationId': medication_id}
-    )
+    # Get existing medication; only a batch's first record for a medication is
+    # prefetched, and the copy is used once
+    if prefetched and (user_id, medication_id) in prefetched:
+        existing_item = prefetched.pop((user_id, medication_id))
+    else:
+        response = medications_table.get_item(
+            Key={'userId': user_id, 'medicationId': medication_id}
+        )
+        existing_item = response.get('Item')
     
-    if 'Item' not in response:
+    if existing_item is None:
         raise ValueError(f"Medication {medication_id} not found for user {user_id}")
     
-    existing_item = response['Item']
-    
     # Update fields
     update_expression = "SET updatedAt = :updated_at"
-    expression_values = {':updated_at': datetime.utcnow().isoformat()}
+    expression_values = {':updated_at': now_iso}
     
     updatable_fields = ['medicationName', 'dosage', 'frequency', 'endDate', 'instructions', 'status']
     
@@ -162,7 +233,22 @@ def update_medication(user_id, medication_data):
             update_expression += f", {field} = :{field}"
             expression_values[f':{field}'] = medication_data[field]
     
-    table.update_item(
+    # A new frequency changes the dose interval and moves the next dose of an
+    # already-taken medication
+    if 'frequency' in medication_data:
+        interval = dose_interval(medication_data['frequency'])
+        update_expression += ", doseIntervalSeconds = :dose_interval"
+        expression_values[':dose_interval'] = interval
+    
+    if 'frequency' in medication_data and existing_item.get('lastTaken'):
+        schedule = dose_schedule(interval, existing_item['lastTaken'])
+        if schedule:
+            update_expression += ", reminderWindowStart = :window_start, nextDoseDueAt = :next_dose_due"
+            expression_values[':window_start'], expression_values[':next_dose_due'] = schedule
+        else:
+            update_expression += " REMOVE reminderWindowStart, nextDoseDueAt"
+    
+    medications_table.update_item(
         Key={'userId': user_id, 'medicationId': medication_id},
         UpdateExpression=update_expression,
         ExpressionAttributeValues=expression_values
@@ -170,21 +256,19 @@ def update_medication(user_id, medication_data):
     
     logger.info(f"Updated medication {medication_id} for user {user_id}")
 
-def remove_medication(user_id, medication_data):
+def remove_medication(user_id, medication_data, now_iso):
     """Remove a medication (soft delete by setting status to inactive)"""
-    table = dynamodb.Table(MEDICATIONS_TABLE)
-    
     medication_id = medication_data.get('medicationId')
     if not medication_id:
         raise ValueError("medicationId is required for removal")
     
-    table.update_item(
+    medications_table.update_item(
         Key={'userId': user_id, 'medicationId': medication_id},
         UpdateExpression="SET #status = :status, updatedAt = :updated_at",
         ExpressionAttributeNames={'#status': 'status'},
         ExpressionAttributeValues={
             ':status': 'inactive',
-            ':updated_at': datetime.utcnow().isoformat()
+            ':updated_at': now_iso
         }
     )
     
@@ -193,104 +277,147 @@ def remove_medication(user_id, medication_data):
     # Update CloudWatch metrics
     update_medication_metrics(user_id, 'medication_removed')
 
-def log_medication_dose(user_id, medication_data):
+def log_medication_dose(user_id, medication_data, now_iso):
     """Log a medication dose taken"""
-    table = dynamodb.Table(MEDICATIONS_TABLE)
-    
     medication_id = medication_data.get('medicationId')
-    dose_time = medication_data.get('doseTime', datetime.utcnow().isoformat())
+    dose_time = medication_data.get('doseTime', now_iso)
     
     if not medication_id:
         raise ValueError("medicationId is required for logging dose")
     
-    # Get existing medication
-    response = table.get_item(
-        Key={'userId': user_id, 'medicationId': medication_id}
-    )
+    key = {'userId': user_id, 'medicationId': medication_id}
     
-    if 'Item' not in response:
+    # Record the dose; the condition stands in for a separate existence read
+    # and the new item comes back for the follow-up calculations
+    try:
+        response = medications_table.update_item(
+            Key=key,
+            UpdateExpression="SET lastTaken = :last_taken, totalDoses = if_not_exists(totalDoses, :zero) + :inc, updatedAt = :updated_at",
+            ConditionExpression='attribute_exists(medicationId)',
+            ExpressionAttributeValues={
+                ':last_taken': dose_time,
+                ':zero': 0,
+                ':inc': 1,
+                ':updated_at': now_iso
+            },
+            ReturnValues='ALL_NEW'
+        )
+    except medications_table.meta.client.exceptions.ConditionalCheckFailedException:
         raise ValueError(f"Medication {medication_id} not found for user {user_id}")
     
-    medication = response['Item']
+    medication = response['Attributes']
     
-    # Update medication record
-    table.update_item(
-        Key={'userId': user_id, 'medicationId': medication_id},
-        UpdateExpression="SET lastTaken = :last_taken, totalDoses = totalDoses + :inc, updatedAt = :updated_at",
-        ExpressionAttributeValues={
-            ':last_taken': dose_time,
-            ':inc': 1,
-            ':updated_at': datetime.utcnow().isoformat()
-        }
-    )
+    # Update expressions cannot divide or do date arithmetic, so the adherence
+    # rate and next dose time follow in one more write
+    adherence_rate = calculate_adherence_rate(medication.get('totalDoses', 0), medication.get('missedDoses', 0))
+    update_expression = "SET adherenceRate = :adherence_rate"
+    expression_values = {':adherence_rate': Decimal(str(adherence_rate))}
+    
+    # Medications added before the interval was stored fall back to parsing
+    # their frequency
+    if 'doseIntervalSeconds' in medication:
+        interval = medication['doseIntervalSeconds']
+    else:
+        interval = dose_interval(medication.get('frequency', ''))
     
-    # Calculate and update adherence rate
-    update_adherence_rate(user_id, medication_id)
+    schedule = dose_schedule(interval, dose_time)
+    if schedule:
+        update_expression += ", reminderWindowStart = :window_start, nextDoseDueAt = :next_dose_due"
+        expression_values[':window_start'], expression_values[':next_dose_due'] = schedule
+    else:
+        update_expression += " REMOVE reminderWindowStart, nextDoseDueAt"
+    
+    medications_table.update_item(
+        Key=key,
+        UpdateExpression=update_expression,
+        ExpressionAttributeValues=expression_values
+    )
     
     logger.info(f"Logged dose for medication {medication_id} for user {user_id}")
     
     # Update CloudWatch metrics
     update_medication_metrics(user_id, 'dose_logged')
 
-def check_medication_reminders():
+def check_medication_reminders(now_iso):
     """Check for medications that need reminders"""
-    table = dynamodb.Table(MEDICATIONS_TABLE)
-    
-    # Scan for active medications
-    response = table.scan(
-        FilterExpression='#status = :status',
-        ExpressionAttributeNames={'#status': 'status'},
-        ExpressionAttributeValues={':status': 'active'}
-    )
+    horizon = (datetime.fromisoformat(now_iso) + REMINDER_LEAD_TIME).isoformat()
     
-    medications = response.get('Items', [])
-    current_time = datetime.utcnow()
+    # Query only active medications whose next dose falls due within the
+    # reminder lead time, instead of scanning the whole table
+    query_args = {
+        'IndexName': REMINDER_INDEX,
+        'KeyConditionExpression': Key('status').eq('active') & Key('nextDoseDueAt').lte(horizon)
+    }
     
-    for medication in medications:
-        if should_send_reminder(medication, current_time):
-            send_medication_reminder(medication)
+    while True:
+        response = medications_table.query(**query_args)
+        
+        for medication in response.get('Items', []):
+            if should_send_reminder(medication, now_iso):
+                send_medication_reminder(medication, now_iso)
+        
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            break
+        
+        query_args['ExclusiveStartKey'] = last_key
 
 def should_send_reminder(medication, current_time):
-    """Determine if a reminder should be sent for a medication"""
-    frequency = medication.get('frequency', '')
-    last_taken = medication.get('lastTaken')
-    
-    if not last_taken:
+    """Determine if a reminder should be sent for a medication at an ISO UTC time"""
+    if not medication.get('lastTaken'):
         # First reminder if never taken
         return True
     
-    last_taken_dt = datetime.fromisoformat(last_taken.replace('Z', '+00:00'))
+    # The reminder window is precomputed whenever a dose is logged, so this
+    # is a plain comparison of ISO timestamps
+    window_start = medication.get('reminderWindowStart')
+    next_dose_due = medication.get('nextDoseDueAt')
+    if not window_start or not next_dose_due:
+        return False
     
-    # Parse frequency and calculate next dose time
+    return window_start <= current_time <= next_dose_due
+
+def dose_interval(frequency):
+    """Seconds between doses for a frequency, or None if it has no interval"""
+    # Parse frequency into a dose interval
     if 'daily' in frequency.lower():
         # Daily medication
         if '2x' in frequency or 'twice' in frequency:
             # Twice daily - every 12 hours
-            next_dose = last_taken_dt + timedelta(hours=12)
+            return 12 * 3600
         elif '3x' in frequency or 'three' in frequency:
             # Three times daily - every 8 hours
-            next_dose = last_taken_dt + timedelta(hours=8)
+            return 8 * 3600
         else:
             # Once daily - every 24 hours
-            next_dose = last_taken_dt + timedelta(hours=24)
+            return 24 * 3600
     elif 'hour' in frequency.lower():
         # Hourly medication
-        hours_match = re.search(r'(\d+)', frequency)
+        hours_match = HOURS_PATTERN.search(frequency)
         if hours_match:
-            hours = int(hours_match.group(1))
-            next_dose = last_taken_dt + timedelta(hours=hours)
+            return int(hours_match.group(1)) * 3600
         else:
-            return False
+            return None
     else:
         # Default to daily
-        next_dose = last_taken_dt + timedelta(hours=24)
+        return 24 * 3600
+
+def dose_schedule(interval, last_taken):
+    """Reminder window start and next dose time as naive UTC ISO strings, or None if there is no interval"""
+    if interval is None:
+        return None
     
-    # Send reminder 15 minutes before next dose
-    reminder_time = next_dose - timedelta(minutes=15)
+    # Stored intervals come back from DynamoDB as Decimal
+    next_dose = datetime.fromisoformat(last_taken.replace('Z', '+00:00')) + timedelta(seconds=int(interval))
     
-    return current_time >= reminder_time and current_time <= next_dose
+    # Normalize offsets so stored times sort correctly against utcnow()
+    if next_dose.tzinfo:
+        next_dose = next_dose.astimezone(timezone.utc).replace(tzinfo=None)
+    
+    # Send reminder 15 minutes before next dose
+    return (next_dose - REMINDER_LEAD_TIME).isoformat(), next_dose.isoformat()
 
-def send_medication_reminder(medication):
+def send_medication_reminder(medication, timestamp):
     """Send medication reminder via SNS"""
     try:
         user_id = medication['userId']
@@ -304,13 +431,13 @@ def send_medication_reminder(medication):
             'medicationName': medication_name,
             'dosage': dosage,
             'frequency': frequency,
-            'timestamp': datetime.utcnow().isoformat(),
+            'timestamp': timestamp,
             'message': f'Time to take {medication_name} ({dosage}) - {frequency}'
         }
         
         sns.publish(
             TopicArn=REMINDERS_TOPIC,
-            Message=json.dumps(reminder_message),
+            Message=encode_json(reminder_message),
             Subject=f'Medication Reminder: {medication_name}'
         )
         
@@ -321,9 +448,7 @@ def send_medication_reminder(medication):
 
 def get_user_medications(user_id):
     """Get all medications for a user"""
-    table = dynamodb.Table(MEDICATIONS_TABLE)
-    
-    response = table.query(
+    response = medications_table.query(
         KeyConditionExpression='userId = :userId',
         ExpressionAttributeValues={':userId': user_id}
     )
@@ -335,52 +460,42 @@ def get_user_medications(user_id):
     
     return active_medications
 
-def update_adherence_rate(user_id, medication_id):
-    """Calculate and update medication adherence rate"""
-    table = dynamodb.Table(MEDICATIONS_TABLE)
-    
-    # Get medication
-    response = table.get_item(
-        Key={'userId': user_id, 'medicationId': medication_id}
-    )
-    
-    if 'Item' not in response:
-        return
-    
-    medication = response['Item']
-    total_doses = medication.get('totalDoses', 0)
-    missed_doses = medication.get('missedDoses', 0)
+def get_medications_batch(keys):
+    """Get medications by (userId, medicationId), mapping keys that do not exist to None"""
+    medications = dict.fromkeys(keys)
+    key_list = [{'userId': user_id, 'medicationId': medication_id} for user_id, medication_id in medications]
     
+    for start in range(0, len(key_list), MEDICATION_BATCH_SIZE):
+        request = {MEDICATIONS_TABLE: {'Keys': key_list[start:start + MEDICATION_BATCH_SIZE]}}
+        
+        # Retry whatever DynamoDB could not return in one go, backing off so a
+        # throttled table gets room to recover
+        delay = UNPROCESSED_RETRY_BASE_DELAY
+        while True:
+            response = dynamodb.batch_get_item(RequestItems=request)
+            for medication in response.get('Responses', {}).get(MEDICATIONS_TABLE, []):
+                medications[(medication['userId'], medication['medicationId'])] = medication
+            request = response.get('UnprocessedKeys')
+            if not request:
+                break
+            time.sleep(delay)
+            delay = min(delay * 2, UNPROCESSED_RETRY_MAX_DELAY)
+    
+    return medications
+
+def calculate_adherence_rate(total_doses, missed_doses):
+    """Calculate medication adherence rate"""
     if total_doses + missed_doses > 0:
-        adherence_rate = total_doses / (total_doses + missed_doses)
+        return total_doses / (total_doses + missed_doses)
     else:
-        adherence_rate = 0.0
-    
-    table.update_item(
-        Key={'userId': user_id, 'medicationId': medication_id},
-        UpdateExpression="SET adherenceRate = :adherence_rate",
-        ExpressionAttributeValues={':adherence_rate': Decimal(str(adherence_rate))}
-    )
+        return 0.0
 
 def validate_frequency(frequency):
     """Validate medication frequency format"""
     if not frequency:
         return False
     
-    # Common frequency patterns
-    patterns = [
-        r'\d+x\s+daily',
-        r'\d+\s+times\s+daily',
-        r'every\s+\d+\s+hours',
-        r'once\s+daily',
-        r'twice\s+daily',
-        r'three\s+times\s+daily',
-        r'as\s+needed',
-        r'prn'
-    ]
-    
-    frequency_lower = frequency.lower()
-    return any(re.search(pattern, frequency_lower) for pattern in patterns)
+    return FREQUENCY_PATTERN.search(frequency.lower()) is not None
 
 def update_medication_metrics(user_id, action):
     """Update CloudWatch metrics for medication management"""
@@ -402,9 +517,7 @@ def update_medication_metrics(user_id, action):
 
 def get_medication_adherence_report(user_id, days=30):
     """Generate medication adherence report for a user"""
-    table = dynamodb.Table(MEDICATIONS_TABLE)
-    
-    response = table.query(
+    response = medications_table.query(
         KeyConditionExpression='userId = :userId',
         ExpressionAttributeValues={':userId': user_id}
     )
@@ -433,3 +546,14 @@ def get_medication_adherence_report(user_id, days=30):
         report['medications'].append(med_report)
     
     return report
+
+# Action dispatch table for process_medication_event; every entry takes
+# (user_id, medication_data, now_iso, prefetched)
+_ACTIONS = {
+    'add_medication': lambda user_id, data, now_iso, prefetched: add_medication(user_id, data, now_iso),
+    'update_medication': update_medication,
+    'remove_medication': lambda user_id, data, now_iso, prefetched: remove_medication(user_id, data, now_iso),
+    'log_dose': lambda user_id, data, now_iso, prefetched: log_medication_dose(user_id, data, now_iso),
+    'check_reminders': lambda user_id, data, now_iso, prefetched: check_medication_reminders(now_iso),
+    'get_medications': lambda user_id, data, now_iso, prefetched: get_user_medications(user_id)
+}
@@ -5,16 +5,35 @@ This script tests the health assistant system by simulating health data,
 validating agent conversations, and checking medication reminders.
 """
 
+import argparse
 import json
 import time
 import random
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from boto3.dynamodb.table import BatchWriter
 from datetime import datetime, timedelta
 from decimal import Decimal
 import uuid
-import sys
+import io
 import os
+import sys
+import re
+import threading
+import queue
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
+
+# orjson encodes the test report much faster when it is installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Configuration
 REGION = "us-east-1"
@@ -22,6 +41,84 @@ STACK_NAME = "ai-health-assistant"
 TEST_USER_ID = "test-user-123"
 API_BASE_URL = ""  # Will be set from CloudFormation outputs
 
+# Shared client settings: keep connections alive between the suite's requests
+AWS_CLIENT_CONFIG = Config(
+    region_name=REGION,
+    tcp_keepalive=True,
+    retries={'mode': 'adaptive', 'max_attempts': 6},
+    max_pool_connections=50
+)
+
+# DynamoDB answers well within a second, so fail fast on a stalled connection
+# instead of waiting out the defaults sized for long Lambda invocations
+DYNAMODB_CLIENT_CONFIG = AWS_CLIENT_CONFIG.merge(Config(connect_timeout=5, read_timeout=10))
+
+# Initialize AWS clients once per process from one explicit session, so
+# credentials and endpoints are resolved once and every tester shares the
+# clients' loaded service models and connection pools
+aws_session = boto3.session.Session(region_name=REGION)
+dynamodb = aws_session.resource('dynamodb', config=DYNAMODB_CLIENT_CONFIG)
+lambda_client = aws_session.client('lambda', config=AWS_CLIENT_CONFIG)
+sns_client = aws_session.client('sns', config=AWS_CLIENT_CONFIG)
+cloudformation = aws_session.client('cloudformation', config=AWS_CLIENT_CONFIG)
+
+# The performance test also times vitals queries through DAX when a cluster
+# endpoint is configured; run it from inside the cluster's VPC
+DAX_ENDPOINT = os.environ.get('DAX_ENDPOINT')
+if DAX_ENDPOINT:
+    from amazondax import AmazonDaxClient
+    dax = AmazonDaxClient.resource(endpoint_url=DAX_ENDPOINT, region_name=REGION)
+else:
+    dax = None
+
+# Upper bound on concurrent Lambda invocations within one test group
+MAX_PARALLEL_INVOKES = 8
+
+# Upper bound on Lambda invocations in flight across all test groups, kept
+# under the account's concurrency so bursts queue here instead of throttling
+LAMBDA_CONCURRENCY_LIMIT = 20
+
+# Burst size for the rate limit resilience check, and the error codes that
+# mean a request was still throttled after retries
+RATE_LIMIT_BURST = 100
+THROTTLING_ERROR_CODES = ('TooManyRequestsException', 'ThrottlingException')
+
+# BatchGetItem key limit
+BATCH_GET_SIZE = 100
+
+# Timed DynamoDB queries per performance run, after one untimed warmup query,
+# and the median latency above which the run is flagged (override with the
+# PERF_P50_THRESHOLD_SEC environment variable when testing from far away)
+PERF_QUERY_SAMPLES = 20
+PERF_P50_THRESHOLD_SEC = float(os.environ.get('PERF_P50_THRESHOLD_SEC', '0.05'))
+
+# Keep-alive connections pooled by the HTTP session used for API checks
+HTTP_POOL_SIZE = 50
+
+# How long to wait for writes from asynchronous Lambda invocations to land
+ASYNC_WRITE_TIMEOUT = 15
+ASYNC_POLL_INTERVAL = 1
+
+# Console marker for each test status; plain ASCII when output is captured
+# by CI logs or a file rather than shown on a terminal
+if sys.stdout.isatty():
+    STATUS_SYMBOLS = {"PASS": "✓", "FAIL": "✗", "WARN": "⚠"}
+else:
+    STATUS_SYMBOLS = {"PASS": "[PASS]", "FAIL": "[FAIL]", "WARN": "[WARN]"}
+
+# Compact encoder for Lambda payloads and SNS messages, built once
+encode_json = json.JSONEncoder(separators=(',', ':')).encode
+
+# Fields shared by every test event sent to the Lambda functions
+BASE_EVENT = {"userId": TEST_USER_ID}
+
+# Serialized Bedrock agent events up to the per-request fields, one per
+# action; the closing brace is dropped so message and session can follow
+AGENT_PAYLOAD_PREFIXES = {
+    action: encode_json({**BASE_EVENT, "action": action})[:-1]
+    for action in ("chat", "health_query", "medication_query")
+}
+
 # Test data
 TEST_VITALS = [
     {
@@ -47,6 +144,18 @@ TEST_VITALS = [
     }
 ]
 
+# Synthetic readings seeded alongside TEST_VITALS: (vital key, mean, standard
+# deviation, decimal places, low, high), kept inside normal ranges so they
+# never trip anomaly alerts
+SYNTHETIC_VITALS_PROFILE = (
+    ("heartRate", 72, 6, 0, 55, 95),
+    ("systolicBP", 120, 6, 0, 105, 135),
+    ("diastolicBP", 80, 4, 0, 70, 88),
+    ("temperature", 98.6, 0.3, 1, 97.5, 99.5),
+    ("oxygenSaturation", 98, 1, 0, 96, 100),
+)
+SYNTHETIC_VITALS_COUNT = 22  # With TEST_VITALS, fills one BatchWriteItem request
+
 TEST_MEDICATIONS = [
     {
         "medicationName": "Metformin",
@@ -73,13 +182,97 @@ TEST_CHAT_MESSAGES = [
     "How can I improve my health?"
 ]
 
+def synthetic_vitals(count, seed=0):
+    """Generate count plausible vitals readings, reproducible for a given seed"""
+    rng = random.Random(seed)
+    
+    # Draw one column per vital, then zip the columns into readings
+    columns = [
+        [min(max(round(rng.gauss(mean, std_dev), digits or None), low), high) for _ in range(count)]
+        for _, mean, std_dev, digits, low, high in SYNTHETIC_VITALS_PROFILE
+    ]
+    keys = [profile[0] for profile in SYNTHETIC_VITALS_PROFILE]
+    return [dict(zip(keys, reading)) for reading in zip(*columns)]
+
+def encode_report(report):
+    """Serialize the test report as indented JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(report, option=orjson.OPT_INDENT_2)
+    return json.dumps(report, indent=2).encode()
+
+def encode_result_line(result):
+    """Serialize one test result as a compact JSON line"""
+    if orjson is not None:
+        return orjson.dumps(result) + b"\n"
+    return encode_json(result).encode() + b"\n"
+
+def agent_payload(action, message):
+    """Serialized Bedrock agent event for a message, in a new session"""
+    return f'{AGENT_PAYLOAD_PREFIXES[action]},"message":{encode_json(message)},"sessionId":"{uuid.uuid4()}"}}'
+
+def find_markers(content, markers):
+    """Return the markers that occur in content, including overlapping ones, in a single scan"""
+    # A lookahead consumes nothing, so every position is tried and overlapping
+    # markers are all seen; with the longest alternatives first, a marker that
+    # prefixes the one matched at a position is present there too
+    ordered = sorted(set(markers), key=len, reverse=True)
+    pattern = re.compile('(?=(' + '|'.join(re.escape(marker) for marker in ordered) + '))')
+    hits = {match.group(1) for match in pattern.finditer(content)}
+    
+    return {marker for marker in markers if any(hit.startswith(marker) for hit in hits)}
+
 class HealthAssistantTester:
-    def __init__(self):
+    def __init__(self, write_report=True):
         self.session = requests.Session()
-        self.dynamodb = boto3.resource('dynamodb', region_name=REGION)
-        self.lambda_client = boto3.client('lambda', region_name=REGION)
-        self.sns_client = boto3.client('sns', region_name=REGION)
+        
+        # Pool enough keep-alive connections for concurrent API probes and
+        # retry idempotent requests on throttling and transient 5xx responses
+        adapter = HTTPAdapter(
+            pool_connections=HTTP_POOL_SIZE,
+            pool_maxsize=HTTP_POOL_SIZE,
+            max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=[429, 500, 502, 503, 504])
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        self.aws_session = aws_session
+        self.dynamodb = dynamodb
+        # Resources are not thread-safe, so concurrent test groups go through
+        # the resource's low-level client, which still converts Python values
+        self.dynamodb_client = dynamodb.meta.client
+        self.lambda_client = lambda_client
+        self.sns_client = sns_client
+        self.cloudformation = cloudformation
         self.test_results = []
+        self.run_id = uuid.uuid4().hex[:8]  # Tags items this run creates
+        self._status_counts = Counter()  # Results per status, kept as they are logged
+        
+        # Every result is also appended to a JSON Lines log as it is logged, so
+        # a run that dies before the report still leaves its results behind;
+        # runs that only need the exit code write neither file
+        self.write_report = write_report
+        self.results_log_filename = None
+        self._results_log = None
+        if write_report:
+            self.results_log_filename = f"test_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+            self._results_log = open(self.results_log_filename, 'wb')
+        self._log_lock = threading.Lock()  # Test groups log from worker threads
+        self._lambda_slots = threading.Semaphore(LAMBDA_CONCURRENCY_LIMIT)
+        
+        # Console output goes through one writer thread so logging never
+        # blocks a test group on stdout
+        self._output = queue.Queue()
+        threading.Thread(target=self._drain_output, daemon=True).start()
+        self._group_output = threading.local()  # Lines buffered by the running test group
+        self._cfn_outputs = None  # Stack outputs, fetched once per run
+        self._cfn_lock = threading.Lock()
+        self._table_descriptions = {}  # DescribeTable responses, cleared per run
+        
+        # Deployed name of each Lambda function, keyed by its stack suffix
+        self._function_names = {
+            function: f"{STACK_NAME}-{function}"
+            for function in ['health-monitoring', 'medication-management', 'health-insights', 'emergency-alerts', 'bedrock-agent']
+        }
         
     def log_test(self, test_name, status, message="", details=None):
         """Log test result"""
@@ -90,32 +283,120 @@ class HealthAssistantTester:
             "timestamp": datetime.utcnow().isoformat(),
             "details": details
         }
-        self.test_results.append(result)
-        
-        status_symbol = "✓" if status == "PASS" else "✗" if status == "FAIL" else "⚠"
-        print(f"{status_symbol} {test_name}: {message}")
-        
+        line = f"{STATUS_SYMBOLS.get(status, STATUS_SYMBOLS['WARN'])} {test_name}: {message}"
         if details:
-            print(f"    Details: {details}")
+            line += f"\n    Details: {details}"
+        
+        # Keep each result with its details as one entry so concurrent groups
+        # never split them
+        with self._log_lock:
+            self.test_results.append(result)
+            self._status_counts[status] += 1
+            if self._results_log is not None:
+                self._results_log.write(encode_result_line(result))
+                self._results_log.flush()
+        self._write_output(line)
     
-    def get_cloudformation_outputs(self):
-        """Get CloudFormation stack outputs"""
+    def log_section(self, title):
+        """Write a test group heading"""
+        self._write_output(f"\n=== {title} ===")
+    
+    def _write_output(self, line):
+        """Buffer a line for the running test group, or queue it when no group is buffering"""
+        lines = getattr(self._group_output, 'lines', None)
+        if lines is None:
+            self._output.put(line)
+        else:
+            lines.append(line)
+    
+    def _run_group(self, test_group):
+        """Run a test group, queueing its heading and results as one block"""
+        self._group_output.lines = []
         try:
-            cloudformation = boto3.client('cloudformation', region_name=REGION)
-            response = cloudformation.describe_stacks(StackName=STACK_NAME)
-            
-            outputs = {}
-            for output in response['Stacks'][0]['Outputs']:
-                outputs[output['OutputKey']] = output['OutputValue']
+            test_group()
+        finally:
+            lines, self._group_output.lines = self._group_output.lines, None
+            if lines:
+                self._output.put("\n".join(lines))
+    
+    def _drain_output(self):
+        """Write queued log lines to stdout from a single thread"""
+        while True:
+            line = self._output.get()
+            sys.stdout.write(line + "\n")
+            self._output.task_done()
+    
+    def flush_output(self):
+        """Wait until every queued log line has been written"""
+        self._output.join()
+    
+    def get_cloudformation_outputs(self):
+        """Get CloudFormation stack outputs, cached after the first successful call"""
+        if self._cfn_outputs is not None:
+            return self._cfn_outputs
+        
+        # Groups starting together wait for a single lookup instead of each
+        # calling DescribeStacks
+        with self._cfn_lock:
+            if self._cfn_outputs is not None:
+                return self._cfn_outputs
+            
+            try:
+                response = self.cloudformation.describe_stacks(StackName=STACK_NAME)
+                
+                outputs = {}
+                for output in response['Stacks'][0]['Outputs']:
+                    outputs[output['OutputKey']] = output['OutputValue']
+                
+                self._cfn_outputs = outputs
+                return outputs
+            except Exception as e:
+                self.log_test("Get CloudFormation Outputs", "FAIL", f"Failed to get stack outputs: {str(e)}")
+                return {}
+    
+    def _describe_table(self, table_name):
+        """Describe a DynamoDB table, cached for the rest of the run"""
+        description = self._table_descriptions.get(table_name)
+        if description is None:
+            description = self.dynamodb_client.describe_table(TableName=table_name)['Table']
+            self._table_descriptions[table_name] = description
+        return description
+    
+    def _invoke(self, function, event):
+        """Invoke a stack Lambda function synchronously and return its parsed response"""
+        # Events may arrive already serialized
+        with self._lambda_slots:
+            response = self.lambda_client.invoke(
+                FunctionName=self._function_names[function],
+                InvocationType='RequestResponse',
+                Payload=event if isinstance(event, str) else encode_json(event)
+            )
             
-            return outputs
-        except Exception as e:
-            self.log_test("Get CloudFormation Outputs", "FAIL", f"Failed to get stack outputs: {str(e)}")
-            return {}
+            return json.load(response['Payload'])
+    
+    def _invoke_async(self, function, event):
+        """Queue an asynchronous invocation of a stack Lambda function, returning whether it was accepted"""
+        with self._lambda_slots:
+            response = self.lambda_client.invoke(
+                FunctionName=self._function_names[function],
+                InvocationType='Event',
+                Payload=encode_json(event)
+            )
+        
+        return response['StatusCode'] == 202
+    
+    def _invoke_all(self, function, events):
+        """Invoke a stack Lambda function once per event concurrently, returning results in order"""
+        # A single call gains nothing from the pool
+        if len(events) == 1:
+            return [self._invoke(function, events[0])]
+        
+        with ThreadPoolExecutor(max_workers=min(len(events), MAX_PARALLEL_INVOKES)) as executor:
+            return list(executor.map(lambda event: self._invoke(function, event), events))
     
     def test_infrastructure_deployment(self):
         """Test if infrastructure is deployed correctly"""
-        print("\n=== Testing Infrastructure Deployment ===")
+        self.log_section("Testing Infrastructure Deployment")
         
         try:
             outputs = self.get_cloudformation_outputs()
@@ -155,7 +436,7 @@ class HealthAssistantTester:
     
     def test_dynamodb_tables(self):
         """Test DynamoDB table access"""
-        print("\n=== Testing DynamoDB Tables ===")
+        self.log_section("Testing DynamoDB Tables")
         
         try:
             outputs = self.get_cloudformation_outputs()
@@ -163,8 +444,7 @@ class HealthAssistantTester:
             # Test Vitals table
             vitals_table_name = outputs.get("VitalsTableName")
             if vitals_table_name:
-                vitals_table = self.dynamodb.Table(vitals_table_name)
-                vitals_table.load()
+                self._describe_table(vitals_table_name)
                 self.log_test("Vitals Table Access", "PASS", f"Table {vitals_table_name} accessible")
             else:
                 self.log_test("Vitals Table Access", "FAIL", "Vitals table name not found")
@@ -172,8 +452,7 @@ class HealthAssistantTester:
             # Test Medications table
             medications_table_name = outputs.get("MedicationsTableName")
             if medications_table_name:
-                medications_table = self.dynamodb.Table(medications_table_name)
-                medications_table.load()
+                self._describe_table(medications_table_name)
                 self.log_test("Medications Table Access", "PASS", f"Table {medications_table_name} accessible")
             else:
                 self.log_test("Medications Table Access", "FAIL", "Medications table name not found")
@@ -181,8 +460,7 @@ class HealthAssistantTester:
             # Test User Profiles table
             profiles_table_name = outputs.get("UserProfilesTableName")
             if profiles_table_name:
-                profiles_table = self.dynamodb.Table(profiles_table_name)
-                profiles_table.load()
+                self._describe_table(profiles_table_name)
                 self.log_test("User Profiles Table Access", "PASS", f"Table {profiles_table_name} accessible")
             else:
                 self.log_test("User Profiles Table Access", "FAIL", "User profiles table name not found")
@@ -192,7 +470,7 @@ class HealthAssistantTester:
     
     def test_health_monitoring_lambda(self):
         """Test health monitoring Lambda function"""
-        print("\n=== Testing Health Monitoring Lambda ===")
+        self.log_section("Testing Health Monitoring Lambda")
         
         try:
             outputs = self.get_cloudformation_outputs()
@@ -200,19 +478,13 @@ class HealthAssistantTester:
             # Test with normal vitals
             test_vitals = TEST_VITALS[0]
             test_event = {
-                "userId": TEST_USER_ID,
+                **BASE_EVENT,
                 "vitals": test_vitals,
                 "timestamp": datetime.utcnow().isoformat()
             }
             
             # Invoke Lambda function
-            response = self.lambda_client.invoke(
-                FunctionName=f"{STACK_NAME}-health-monitoring",
-                InvocationType='RequestResponse',
-                Payload=json.dumps(test_event)
-            )
-            
-            result = json.loads(response['Payload'].read())
+            result = self._invoke("health-monitoring", test_event)
             
             if result.get('statusCode') == 200:
                 self.log_test("Health Monitoring Lambda", "PASS", 
@@ -231,18 +503,12 @@ class HealthAssistantTester:
             }
             
             abnormal_event = {
-                "userId": TEST_USER_ID,
+                **BASE_EVENT,
                 "vitals": abnormal_vitals,
                 "timestamp": datetime.utcnow().isoformat()
             }
             
-            response = self.lambda_client.invoke(
-                FunctionName=f"{STACK_NAME}-health-monitoring",
-                InvocationType='RequestResponse',
-                Payload=json.dumps(abnormal_event)
-            )
-            
-            result = json.loads(response['Payload'].read())
+            result = self._invoke("health-monitoring", abnormal_event)
             
             if result.get('statusCode') == 200:
                 self.log_test("Health Monitoring Lambda - Anomaly Detection", "PASS", 
@@ -256,45 +522,51 @@ class HealthAssistantTester:
     
     def test_medication_management_lambda(self):
         """Test medication management Lambda function"""
-        print("\n=== Testing Medication Management Lambda ===")
+        self.log_section("Testing Medication Management Lambda")
         
         try:
-            # Test adding medication
+            # One timestamp for every event in this group
+            now_iso = datetime.utcnow().isoformat()
+            
+            # Adding a medication returns nothing worth inspecting, so the adds
+            # are queued as asynchronous events and confirmed in DynamoDB; IDs
+            # are unique to this run so rows left by an earlier run never pass
+            medication_keys = {}
             for medication in TEST_MEDICATIONS:
+                medication_id = f"test-{medication['medicationName'].lower()}-{self.run_id}"
                 add_event = {
                     "action": "add_medication",
-                    "userId": TEST_USER_ID,
+                    **BASE_EVENT,
+                    "medicationId": medication_id,
                     **medication
                 }
                 
-                response = self.lambda_client.invoke(
-                    FunctionName=f"{STACK_NAME}-medication-management",
-                    InvocationType='RequestResponse',
-                    Payload=json.dumps(add_event)
-                )
-                
-                result = json.loads(response['Payload'].read())
-                
-                if result.get('statusCode') == 200:
-                    self.log_test(f"Add Medication - {medication['medicationName']}", "PASS", 
-                                "Medication added successfully")
+                if self._invoke_async("medication-management", add_event):
+                    medication_keys[medication['medicationName']] = {"userId": TEST_USER_ID, "medicationId": medication_id}
                 else:
                     self.log_test(f"Add Medication - {medication['medicationName']}", "FAIL", 
-                                f"Failed to add medication: {result}")
+                                "Add medication event was not accepted")
+            
+            medications_table_name = self.get_cloudformation_outputs().get("MedicationsTableName")
+            if medication_keys and medications_table_name:
+                stored = self.wait_for_items(medications_table_name, list(medication_keys.values()))
+                stored_ids = {item["medicationId"] for item in stored}
+                
+                for medication_name, key in medication_keys.items():
+                    if key["medicationId"] in stored_ids:
+                        self.log_test(f"Add Medication - {medication_name}", "PASS", 
+                                    "Medication added successfully")
+                    else:
+                        self.log_test(f"Add Medication - {medication_name}", "FAIL", 
+                                    f"Medication not stored within {ASYNC_WRITE_TIMEOUT}s")
             
             # Test getting medications
             get_event = {
                 "action": "get_medications",
-                "userId": TEST_USER_ID
+                **BASE_EVENT
             }
             
-            response = self.lambda_client.invoke(
-                FunctionName=f"{STACK_NAME}-medication-management",
-                InvocationType='RequestResponse',
-                Payload=json.dumps(get_event)
-            )
-            
-            result = json.loads(response['Payload'].read())
+            result = self._invoke("medication-management", get_event)
             
             if result.get('statusCode') == 200:
                 self.log_test("Get Medications", "PASS", "Successfully retrieved medications")
@@ -304,18 +576,12 @@ class HealthAssistantTester:
             # Test logging dose
             log_dose_event = {
                 "action": "log_dose",
-                "userId": TEST_USER_ID,
+                **BASE_EVENT,
                 "medicationId": "med1",  # Assuming first medication
-                "doseTime": datetime.utcnow().isoformat()
+                "doseTime": now_iso
             }
             
-            response = self.lambda_client.invoke(
-                FunctionName=f"{STACK_NAME}-medication-management",
-                InvocationType='RequestResponse',
-                Payload=json.dumps(log_dose_event)
-            )
-            
-            result = json.loads(response['Payload'].read())
+            result = self._invoke("medication-management", log_dose_event)
             
             if result.get('statusCode') == 200:
                 self.log_test("Log Medication Dose", "PASS", "Successfully logged dose")
@@ -327,23 +593,17 @@ class HealthAssistantTester:
     
     def test_health_insights_lambda(self):
         """Test health insights Lambda function"""
-        print("\n=== Testing Health Insights Lambda ===")
+        self.log_section("Testing Health Insights Lambda")
         
         try:
             # Test generating insights
             insights_event = {
                 "action": "generate_insights",
-                "userId": TEST_USER_ID,
+                **BASE_EVENT,
                 "days": 7
             }
             
-            response = self.lambda_client.invoke(
-                FunctionName=f"{STACK_NAME}-health-insights",
-                InvocationType='RequestResponse',
-                Payload=json.dumps(insights_event)
-            )
-            
-            result = json.loads(response['Payload'].read())
+            result = self._invoke("health-insights", insights_event)
             
             if result.get('statusCode') == 200:
                 self.log_test("Generate Health Insights", "PASS", "Successfully generated insights")
@@ -353,17 +613,11 @@ class HealthAssistantTester:
             # Test getting recommendations
             recommendations_event = {
                 "action": "get_recommendations",
-                "userId": TEST_USER_ID,
+                **BASE_EVENT,
                 "days": 7
             }
             
-            response = self.lambda_client.invoke(
-                FunctionName=f"{STACK_NAME}-health-insights",
-                InvocationType='RequestResponse',
-                Payload=json.dumps(recommendations_event)
-            )
-            
-            result = json.loads(response['Payload'].read())
+            result = self._invoke("health-insights", recommendations_event)
             
             if result.get('statusCode') == 200:
                 self.log_test("Get Health Recommendations", "PASS", "Successfully retrieved recommendations")
@@ -375,7 +629,7 @@ class HealthAssistantTester:
     
     def test_emergency_alerts_lambda(self):
         """Test emergency alerts Lambda function"""
-        print("\n=== Testing Emergency Alerts Lambda ===")
+        self.log_section("Testing Emergency Alerts Lambda")
         
         try:
             # Test emergency condition detection
@@ -390,18 +644,12 @@ class HealthAssistantTester:
             
             emergency_event = {
                 "action": "check_emergency",
-                "userId": TEST_USER_ID,
+                **BASE_EVENT,
                 "vitals": emergency_vitals,
                 "timestamp": datetime.utcnow().isoformat()
             }
             
-            response = self.lambda_client.invoke(
-                FunctionName=f"{STACK_NAME}-emergency-alerts",
-                InvocationType='RequestResponse',
-                Payload=json.dumps(emergency_event)
-            )
-            
-            result = json.loads(response['Payload'].read())
+            result = self._invoke("emergency-alerts", emergency_event)
             
             if result.get('statusCode') == 200:
                 self.log_test("Emergency Condition Detection", "PASS", "Successfully detected emergency conditions")
@@ -411,7 +659,7 @@ class HealthAssistantTester:
             # Test sending emergency alert
             alert_event = {
                 "action": "send_emergency_alert",
-                "userId": TEST_USER_ID,
+                **BASE_EVENT,
                 "condition": {
                     "type": "CRITICAL_HEART_RATE",
                     "severity": "CRITICAL",
@@ -422,13 +670,7 @@ class HealthAssistantTester:
                 "timestamp": datetime.utcnow().isoformat()
             }
             
-            response = self.lambda_client.invoke(
-                FunctionName=f"{STACK_NAME}-emergency-alerts",
-                InvocationType='RequestResponse',
-                Payload=json.dumps(alert_event)
-            )
-            
-            result = json.loads(response['Payload'].read())
+            result = self._invoke("emergency-alerts", alert_event)
             
             if result.get('statusCode') == 200:
                 self.log_test("Send Emergency Alert", "PASS", "Successfully sent emergency alert")
@@ -440,79 +682,39 @@ class HealthAssistantTester:
     
     def test_bedrock_agent_lambda(self):
         """Test Bedrock Agent Lambda function"""
-        print("\n=== Testing Bedrock Agent Lambda ===")
+        self.log_section("Testing Bedrock Agent Lambda")
         
         try:
-            # Test chat functionality
-            for message in TEST_CHAT_MESSAGES[:3]:  # Test first 3 messages
-                chat_event = {
-                    "action": "chat",
-                    "userId": TEST_USER_ID,
-                    "message": message,
-                    "sessionId": str(uuid.uuid4())
-                }
-                
-                response = self.lambda_client.invoke(
-                    FunctionName=f"{STACK_NAME}-bedrock-agent",
-                    InvocationType='RequestResponse',
-                    Payload=json.dumps(chat_event)
-                )
-                
-                result = json.loads(response['Payload'].read())
-                
-                if result.get('statusCode') == 200:
-                    self.log_test(f"Chat - {message[:30]}...", "PASS", "Successfully processed chat message")
-                else:
-                    self.log_test(f"Chat - {message[:30]}...", "FAIL", f"Failed to process chat: {result}")
+            # The chat, health query and medication query requests are
+            # independent, so they run concurrently
+            checks = [
+                (f"Chat - {message[:30]}...", "Successfully processed chat message", "Failed to process chat", 
+                 agent_payload("chat", message))
+                for message in TEST_CHAT_MESSAGES[:3]  # Test first 3 messages
+            ]
             
             # Test health query
-            health_query_event = {
-                "action": "health_query",
-                "userId": TEST_USER_ID,
-                "message": "What's my current heart rate?",
-                "sessionId": str(uuid.uuid4())
-            }
-            
-            response = self.lambda_client.invoke(
-                FunctionName=f"{STACK_NAME}-bedrock-agent",
-                InvocationType='RequestResponse',
-                Payload=json.dumps(health_query_event)
-            )
-            
-            result = json.loads(response['Payload'].read())
-            
-            if result.get('statusCode') == 200:
-                self.log_test("Health Query", "PASS", "Successfully processed health query")
-            else:
-                self.log_test("Health Query", "FAIL", f"Failed to process health query: {result}")
+            checks.append(("Health Query", "Successfully processed health query", "Failed to process health query", 
+                           agent_payload("health_query", "What's my current heart rate?")))
             
             # Test medication query
-            medication_query_event = {
-                "action": "medication_query",
-                "userId": TEST_USER_ID,
-                "message": "When is my next medication due?",
-                "sessionId": str(uuid.uuid4())
-            }
+            checks.append(("Medication Query", "Successfully processed medication query", "Failed to process medication query", 
+                           agent_payload("medication_query", "When is my next medication due?")))
             
-            response = self.lambda_client.invoke(
-                FunctionName=f"{STACK_NAME}-bedrock-agent",
-                InvocationType='RequestResponse',
-                Payload=json.dumps(medication_query_event)
-            )
+            results = self._invoke_all("bedrock-agent", [event for _, _, _, event in checks])
             
-            result = json.loads(response['Payload'].read())
-            
-            if result.get('statusCode') == 200:
-                self.log_test("Medication Query", "PASS", "Successfully processed medication query")
-            else:
-                self.log_test("Medication Query", "FAIL", f"Failed to process medication query: {result}")
+            for (test_name, success_message, failure_message, _), result in zip(checks, results):
+                if result.get('statusCode') == 200:
+                    self.log_test(test_name, "PASS", success_message)
+                else:
+                    self.log_test(test_name, "FAIL", f"{failure_message}: {result}")
                 
         except Exception as e:
             self.log_test("Bedrock Agent Lambda", "FAIL", f"Error: {str(e)}")
     
     def test_sns_notifications(self):
         """Test SNS notification functionality"""
-        print("\n=== Testing SNS Notifications ===")
+        self.log_section("Testing SNS Notifications")
         
         try:
             outputs = self.get_cloudformation_outputs()
@@ -529,7 +731,7 @@ class HealthAssistantTester:
                 
                 response = self.sns_client.publish(
                     TopicArn=health_alerts_topic,
-                    Message=json.dumps(test_message),
+                    Message=encode_json(test_message),
                     Subject="Test Health Alert"
                 )
                 
@@ -552,7 +754,7 @@ class HealthAssistantTester:
                 
                 response = self.sns_client.publish(
                     TopicArn=medication_reminders_topic,
-                    Message=json.dumps(test_message),
+                    Message=encode_json(test_message),
                     Subject="Test Medication Reminder"
                 )
                 
@@ -568,44 +770,44 @@ class HealthAssistantTester:
     
     def test_data_persistence(self):
         """Test data persistence in DynamoDB"""
-        print("\n=== Testing Data Persistence ===")
+        self.log_section("Testing Data Persistence")
         
         try:
             outputs = self.get_cloudformation_outputs()
+            keys_by_table = {}
+            
+            # One ingest time for every row written by this test
+            now = datetime.utcnow()
+            now_iso = now.isoformat()
             
             # Test vitals data persistence
             vitals_table_name = outputs.get("VitalsTableName")
             if vitals_table_name:
-                vitals_table = self.dynamodb.Table(vitals_table_name)
-                
-                # Insert test vitals
-                test_vitals_item = {
-                    "userId": TEST_USER_ID,
-                    "timestamp": datetime.utcnow().isoformat(),
-                    "vitals": TEST_VITALS[0],
-                    "processedAt": datetime.utcnow().isoformat()
-                }
-                
-                vitals_table.put_item(Item=test_vitals_item)
-                
-                # Retrieve test vitals
-                response = vitals_table.get_item(
-                    Key={
+                # Insert every test reading, plus synthetic ones, in one batch;
+                # readings a second apart keep their timestamp keys distinct,
+                # and floats become Decimals as DynamoDB requires
+                test_vitals_items = [
+                    {
                         "userId": TEST_USER_ID,
-                        "timestamp": test_vitals_item["timestamp"]
+                        "timestamp": (now - timedelta(seconds=index)).isoformat(),
+                        "vitals": {key: Decimal(str(value)) if isinstance(value, float) else value for key, value in vitals.items()},
+                        "processedAt": now_iso
                     }
-                )
+                    for index, vitals in enumerate(TEST_VITALS + synthetic_vitals(SYNTHETIC_VITALS_COUNT))
+                ]
                 
-                if "Item" in response:
-                    self.log_test("Vitals Data Persistence", "PASS", "Successfully stored and retrieved vitals")
-                else:
-                    self.log_test("Vitals Data Persistence", "FAIL", "Failed to retrieve stored vitals")
+                with BatchWriter(vitals_table_name, self.dynamodb_client) as batch:
+                    for item in test_vitals_items:
+                        batch.put_item(Item=item)
+                
+                keys_by_table[vitals_table_name] = [
+                    {"userId": TEST_USER_ID, "timestamp": item["timestamp"]}
+                    for item in test_vitals_items
+                ]
             
             # Test medications data persistence
             medications_table_name = outputs.get("MedicationsTableName")
             if medications_table_name:
-                medications_table = self.dynamodb.Table(medications_table_name)
-                
                 # Insert test medication
                 test_medication_item = {
                     "userId": TEST_USER_ID,
@@ -614,20 +816,32 @@ class HealthAssistantTester:
                     "dosage": "100mg",
                     "frequency": "once daily",
                     "status": "active",
-                    "createdAt": datetime.utcnow().isoformat()
+                    "createdAt": now_iso
                 }
                 
-                medications_table.put_item(Item=test_medication_item)
+                self.dynamodb_client.put_item(TableName=medications_table_name, Item=test_medication_item)
                 
-                # Retrieve test medication
-                response = medications_table.get_item(
-                    Key={
-                        "userId": TEST_USER_ID,
-                        "medicationId": "test-med-1"
-                    }
-                )
+                keys_by_table[medications_table_name] = [
+                    {"userId": TEST_USER_ID, "medicationId": "test-med-1"}
+                ]
+            
+            # Read everything back from both tables in as few round trips as
+            # possible
+            retrieved = self.batch_get_items(keys_by_table)
+            
+            if vitals_table_name:
+                found = {item["timestamp"] for item in retrieved[vitals_table_name]}
+                missing = [key["timestamp"] for key in keys_by_table[vitals_table_name] if key["timestamp"] not in found]
                 
-                if "Item" in response:
+                if not missing:
+                    self.log_test("Vitals Data Persistence", "PASS", 
+                                f"Successfully stored and retrieved {len(test_vitals_items)} vitals readings")
+                else:
+                    self.log_test("Vitals Data Persistence", "FAIL", "Failed to retrieve stored vitals", 
+                                {"missing_timestamps": missing})
+            
+            if medications_table_name:
+                if retrieved[medications_table_name]:
                     self.log_test("Medications Data Persistence", "PASS", "Successfully stored and retrieved medication")
                 else:
                     self.log_test("Medications Data Persistence", "FAIL", "Failed to retrieve stored medication")
@@ -635,25 +849,56 @@ class HealthAssistantTester:
         except Exception as e:
             self.log_test("Data Persistence", "FAIL", f"Error: {str(e)}")
     
+    def batch_get_items(self, keys_by_table):
+        """Fetch items by key across tables with BatchGetItem, returning the items found per table"""
+        items_by_table = {table_name: [] for table_name in keys_by_table}
+        pending = [(table_name, key) for table_name, keys in keys_by_table.items() for key in keys]
+        
+        for start in range(0, len(pending), BATCH_GET_SIZE):
+            request = {}
+            for table_name, key in pending[start:start + BATCH_GET_SIZE]:
+                request.setdefault(table_name, {"Keys": []})["Keys"].append(key)
+            
+            # Keys DynamoDB could not serve this time are retried until done
+            while request:
+                response = self.dynamodb_client.batch_get_item(RequestItems=request)
+                for table_name, items in response.get("Responses", {}).items():
+                    items_by_table[table_name].extend(items)
+                request = response.get("UnprocessedKeys")
+        
+        return items_by_table
+    
+    def wait_for_items(self, table_name, keys, timeout=None):
+        """Poll a table until every key exists or the timeout passes, returning the items found"""
+        deadline = time.monotonic() + (ASYNC_WRITE_TIMEOUT if timeout is None else timeout)
+        
+        while True:
+            items = self.batch_get_items({table_name: keys})[table_name]
+            if len(items) >= len(keys) or time.monotonic() >= deadline:
+                return items
+            time.sleep(ASYNC_POLL_INTERVAL)
+    
     def test_web_application(self):
         """Test web application accessibility"""
-        print("\n=== Testing Web Application ===")
+        self.log_section("Testing Web Application")
         
         try:
-            # Test if web files exist
+            # Test if web files exist, reading each one that does; opening
+            # directly avoids a separate existence check per file
             web_files = ["index.html", "style.css", "app.js"]
+            web_contents = {}
             
             for file in web_files:
-                if os.path.exists(file):
+                try:
+                    with open(file, "r", encoding="utf-8") as f:
+                        web_contents[file] = f.read()
                     self.log_test(f"Web File - {file}", "PASS", "File exists")
-                else:
+                except FileNotFoundError:
                     self.log_test(f"Web File - {file}", "FAIL", "File not found")
             
             # Test HTML structure
-            if os.path.exists("index.html"):
-                with open("index.html", "r") as f:
-                    html_content = f.read()
-                    
+            html_content = web_contents.get("index.html")
+            if html_content is not None:
                 required_elements = [
                     "AI Health Assistant",
                     "dashboard",
@@ -663,17 +908,18 @@ class HealthAssistantTester:
                     "chat"
                 ]
                 
+                # Lowercase the page once and scan it in a single pass
+                found_elements = find_markers(html_content.lower(), [element.lower() for element in required_elements])
+                
                 for element in required_elements:
-                    if element.lower() in html_content.lower():
+                    if element.lower() in found_elements:
                         self.log_test(f"HTML Element - {element}", "PASS", "Element found")
                     else:
                         self.log_test(f"HTML Element - {element}", "FAIL", "Element not found")
             
             # Test CSS structure
-            if os.path.exists("style.css"):
-                with open("style.css", "r") as f:
-                    css_content = f.read()
-                    
+            css_content = web_contents.get("style.css")
+            if css_content is not None:
                 required_classes = [
                     "dashboard",
                     "header",
@@ -683,17 +929,17 @@ class HealthAssistantTester:
                     "stats-grid"
                 ]
                 
+                found_classes = find_markers(css_content, [f".{class_name}" for class_name in required_classes])
+                
                 for class_name in required_classes:
-                    if f".{class_name}" in css_content:
+                    if f".{class_name}" in found_classes:
                         self.log_test(f"CSS Class - {class_name}", "PASS", "Class found")
                     else:
                         self.log_test(f"CSS Class - {class_name}", "FAIL", "Class not found")
             
             # Test JavaScript structure
-            if os.path.exists("app.js"):
-                with open("app.js", "r") as f:
-                    js_content = f.read()
-                    
+            js_content = web_contents.get("app.js")
+            if js_content is not None:
                 required_functions = [
                     "initializeApp",
                     "loadDashboardData",
@@ -702,8 +948,10 @@ class HealthAssistantTester:
                     "generateInsights"
                 ]
                 
+                found_functions = find_markers(js_content, required_functions)
+                
                 for function_name in required_functions:
-                    if function_name in js_content:
+                    if function_name in found_functions:
                         self.log_test(f"JavaScript Function - {function_name}", "PASS", "Function found")
                     else:
                         self.log_test(f"JavaScript Function - {function_name}", "FAIL", "Function not found")
@@ -713,25 +961,30 @@ class HealthAssistantTester:
     
     def run_performance_test(self):
         """Run performance tests"""
-        print("\n=== Running Performance Tests ===")
+        self.log_section("Running Performance Tests")
         
         try:
-            # Test Lambda function performance
-            start_time = time.time()
-            
+            # Build the event before timing starts
             test_event = {
-                "userId": TEST_USER_ID,
+                **BASE_EVENT,
                 "vitals": TEST_VITALS[0],
                 "timestamp": datetime.utcnow().isoformat()
             }
             
+            # Test Lambda function performance
+            start_time = time.perf_counter()
+            
             response = self.lambda_client.invoke(
-                FunctionName=f"{STACK_NAME}-health-monitoring",
+                FunctionName=self._function_names['health-monitoring'],
                 InvocationType='RequestResponse',
-                Payload=json.dumps(test_event)
+                Payload=encode_json(test_event)
             )
             
-            end_time = time.time()
+            # Drain the response so the timing covers the full round trip and
+            # the connection goes back to the pool
+            response['Payload'].read()
+            
+            end_time = time.perf_counter()
             execution_time = end_time - start_time
             
             if execution_time < 5.0:  # Less than 5 seconds
@@ -739,74 +992,148 @@ class HealthAssistantTester:
             else:
                 self.log_test("Lambda Performance", "WARN", f"Slow execution time: {execution_time:.2f}s")
             
-            # Test DynamoDB performance
-            start_time = time.time()
-            
+            # Test DynamoDB performance; the stack lookup stays outside the
+            # timed section
             outputs = self.get_cloudformation_outputs()
             vitals_table_name = outputs.get("VitalsTableName")
             
             if vitals_table_name:
-                vitals_table = self.dynamodb.Table(vitals_table_name)
-                
-                # Test query performance
-                response = vitals_table.query(
-                    KeyConditionExpression='userId = :userId',
-                    ExpressionAttributeValues={':userId': TEST_USER_ID},
-                    Limit=10
-                )
+                query = {
+                    'KeyConditionExpression': 'userId = :userId',
+                    'ExpressionAttributeValues': {':userId': TEST_USER_ID},
+                    'Limit': 10
+                }
                 
-                end_time = time.time()
-                execution_time = end_time - start_time
+                # Test query performance, directly and through DAX if configured
+                queries = [("DynamoDB Performance",
+                            lambda: self.dynamodb_client.query(TableName=vitals_table_name, **query))]
+                if dax is not None:
+                    dax_table = dax.Table(vitals_table_name)
+                    queries.append(("DAX Performance", lambda: dax_table.query(**query)))
                 
-                if execution_time < 2.0:  # Less than 2 seconds
-                    self.log_test("DynamoDB Performance", "PASS", f"Query time: {execution_time:.2f}s")
-                else:
-                    self.log_test("DynamoDB Performance", "WARN", f"Slow query time: {execution_time:.2f}s")
+                for test_name, run_query in queries:
+                    cold_time, samples = self._time_queries(run_query)
+                    
+                    median_time = statistics.median(samples)
+                    # Inclusive method keeps p99 within the observed samples
+                    p99_time = statistics.quantiles(samples, n=100, method='inclusive')[98]
+                    timings = f"median {median_time:.3f}s, p99 {p99_time:.3f}s over {len(samples)} queries"
+                    details = {"cold_seconds": round(cold_time, 4), "hot_median_seconds": round(median_time, 4)}
+                    
+                    if median_time < PERF_P50_THRESHOLD_SEC:
+                        self.log_test(test_name, "PASS", f"Query time: {timings}", details)
+                    else:
+                        self.log_test(test_name, "WARN", f"Slow query time: {timings}", details)
             
         except Exception as e:
             self.log_test("Performance Tests", "FAIL", f"Error: {str(e)}")
     
+    def _time_queries(self, run_query):
+        """Time a first, cold query and then PERF_QUERY_SAMPLES warm ones, in seconds"""
+        # The cold query absorbs credential resolution, the TLS handshake and
+        # cache misses, so it stays out of the steady-state samples
+        start_time = time.perf_counter_ns()
+        run_query()
+        cold_time = (time.perf_counter_ns() - start_time) / 1e9
+        
+        samples = []
+        for _ in range(PERF_QUERY_SAMPLES):
+            start_time = time.perf_counter_ns()
+            run_query()
+            samples.append(time.perf_counter_ns() - start_time)
+        
+        return cold_time, [sample / 1e9 for sample in samples]
+    
+    def test_rate_limit_resilience(self):
+        """Test that a burst of Lambda invocations completes without surfacing throttling"""
+        self.log_section("Testing Rate Limit Resilience")
+        
+        try:
+            # Read-only, so the burst leaves no data behind
+            event = {**BASE_EVENT, "action": "get_medications"}
+            
+            def invoke(_):
+                try:
+                    self._invoke("medication-management", event)
+                    return None
+                except ClientError as e:
+                    return e.response['Error']['Code']
+            
+            with ThreadPoolExecutor(max_workers=LAMBDA_CONCURRENCY_LIMIT) as executor:
+                errors = [code for code in executor.map(invoke, range(RATE_LIMIT_BURST)) if code]
+            
+            throttled = sum(1 for code in errors if code in THROTTLING_ERROR_CODES)
+            
+            if not errors:
+                self.log_test("Rate Limit Resilience", "PASS", 
+                            f"All {RATE_LIMIT_BURST} burst invocations completed")
+            elif throttled:
+                self.log_test("Rate Limit Resilience", "FAIL", 
+                            f"{throttled} of {RATE_LIMIT_BURST} burst invocations throttled after retries")
+            else:
+                self.log_test("Rate Limit Resilience", "FAIL", 
+                            f"{len(errors)} of {RATE_LIMIT_BURST} burst invocations failed", 
+                            {"error_codes": sorted(set(errors))})
+                
+        except Exception as e:
+            self.log_test("Rate Limit Resilience", "FAIL", f"Error: {str(e)}")
+    
     def generate_test_report(self):
         """Generate comprehensive test report"""
-        print("\n" + "="*60)
-        print("AI HEALTH ASSISTANT TEST REPORT")
-        print("="*60)
-        
+        # Statuses are counted as results are logged
         total_tests = len(self.test_results)
-        passed_tests = len([r for r in self.test_results if r["status"] == "PASS"])
-        failed_tests = len([r for r in self.test_results if r["status"] == "FAIL"])
-        warning_tests = len([r for r in self.test_results if r["status"] == "WARN"])
+        passed_tests = self._status_counts["PASS"]
+        failed_tests = self._status_counts["FAIL"]
+        warning_tests = self._status_counts["WARN"]
+        success_rate = 100.0 * passed_tests / total_tests if total_tests else 0.0
         
-        print(f"\nSUMMARY:")
-        print(f"Total Tests: {total_tests}")
-        print(f"Passed: {passed_tests}")
-        print(f"Failed: {failed_tests}")
-        print(f"Warnings: {warning_tests}")
-        print(f"Success Rate: {(passed_tests/total_tests)*100:.1f}%")
+        # Format the whole console report into one buffer and write it at once
+        out = io.StringIO()
+        out.write("\n" + "="*60 + "\n")
+        out.write("AI HEALTH ASSISTANT TEST REPORT\n")
+        out.write("="*60 + "\n")
         
-        print(f"\nDETAILED RESULTS:")
-        print("-" * 60)
+        out.write("\n".join([
+            "\nSUMMARY:",
+            f"Total Tests: {total_tests}",
+            f"Passed: {passed_tests}",
+            f"Failed: {failed_tests}",
+            f"Warnings: {warning_tests}",
+            f"Success Rate: {success_rate:.1f}%\n"
+        ]))
+        
+        out.write("\nDETAILED RESULTS:\n")
+        out.write("-" * 60 + "\n")
         
         for result in self.test_results:
-            status_symbol = "✓" if result["status"] == "PASS" else "✗" if result["status"] == "FAIL" else "⚠"
-            print(f"{status_symbol} {result['test_name']}: {result['message']}")
+            out.write(f"{STATUS_SYMBOLS.get(result['status'], STATUS_SYMBOLS['WARN'])} {result['test_name']}: {result['message']}\n")
             if result.get('details'):
-                print(f"    Details: {result['details']}")
-        
-        # Save report to file
-        report_filename = f"test_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        with open(report_filename, 'w') as f:
-            json.dump({
-                "summary": {
-                    "total_tests": total_tests,
-                    "passed_tests": passed_tests,
-                    "failed_tests": failed_tests,
-                    "warning_tests": warning_tests,
-                    "success_rate": (passed_tests/total_tests)*100
-                },
-                "results": self.test_results,
-                "timestamp": datetime.utcnow().isoformat()
-            }, f, indent=2)
+                out.write(f"    Details: {result['details']}\n")
+        
+        sys.stdout.write(out.getvalue())
+        
+        # Return success if all critical tests passed
+        if not self.write_report:
+            return failed_tests == 0
+        
+        # Save report to file, encoded in one call and written at once; one
+        # clock read names the file and stamps the payload
+        generated_at = datetime.utcnow()
+        report = {
+            "summary": {
+                "total_tests": total_tests,
+                "passed_tests": passed_tests,
+                "failed_tests": failed_tests,
+                "warning_tests": warning_tests,
+                "success_rate": success_rate
+            },
+            "results": self.test_results,
+            "timestamp": generated_at.isoformat()
+        }
+        
+        report_filename = f"test_report_{generated_at.strftime('%Y%m%d_%H%M%S')}.json"
+        with open(report_filename, 'wb') as f:
+            f.write(encode_report(report))
         
         print(f"\nDetailed report saved to: {report_filename}")
         
@@ -819,22 +1146,42 @@ class HealthAssistantTester:
         print(f"Test User ID: {TEST_USER_ID}")
         print(f"Region: {REGION}")
         print(f"Stack Name: {STACK_NAME}")
+        if self.results_log_filename:
+            print(f"Results Log: {self.results_log_filename}")
         
-        # Run all test categories
-        self.test_infrastructure_deployment()
-        self.test_dynamodb_tables()
-        self.test_health_monitoring_lambda()
-        self.test_medication_management_lambda()
-        self.test_health_insights_lambda()
-        self.test_emergency_alerts_lambda()
-        self.test_bedrock_agent_lambda()
-        self.test_sns_notifications()
-        self.test_data_persistence()
-        self.test_web_application()
+        # Table metadata may change between runs
+        self._table_descriptions.clear()
+        
+        # The groups are independent and mostly wait on AWS, so they run
+        # concurrently, each printed as one block once it finishes; the stack
+        # outputs they share are fetched only once
+        test_groups = [
+            self.test_infrastructure_deployment,
+            self.test_dynamodb_tables,
+            self.test_health_monitoring_lambda,
+            self.test_medication_management_lambda,
+            self.test_health_insights_lambda,
+            self.test_emergency_alerts_lambda,
+            self.test_bedrock_agent_lambda,
+            self.test_sns_notifications,
+            self.test_data_persistence,
+            self.test_web_application
+        ]
+        with ThreadPoolExecutor(max_workers=len(test_groups)) as executor:
+            for future in [executor.submit(self._run_group, test_group) for test_group in test_groups]:
+                future.result()
+        
+        # Timings are only meaningful once nothing else is in flight
         self.run_performance_test()
         
-        # Generate report
+        # The burst check runs last so it cannot slow the other groups
+        self.test_rate_limit_resilience()
+        
+        # Generate report once every queued result line is out
+        self.flush_output()
         success = self.generate_test_report()
+        if self._results_log is not None:
+            self._results_log.close()
         
         if success:
             print("\n🎉 All tests passed! The AI Health Assistant is ready for use.")
@@ -845,11 +1192,20 @@ class HealthAssistantTester:
 
 def main():
     """Main function"""
-    if len(sys.argv) > 1:
-        global STACK_NAME
-        STACK_NAME = sys.argv[1]
+    global STACK_NAME
+    
+    # Emit UTF-8 whatever the console's locale, so status lines never hit
+    # encoding errors
+    sys.stdout.reconfigure(encoding='utf-8')
+    
+    parser = argparse.ArgumentParser(description="AI Health Assistant Test Suite")
+    parser.add_argument("stack_name", nargs="?", default=STACK_NAME, help=f"CloudFormation stack name (default: {STACK_NAME})")
+    parser.add_argument("--no-report", action="store_true", help="skip writing the JSON report and results log; only the exit code matters")
+    args = parser.parse_args()
+    
+    STACK_NAME = args.stack_name
     
-    tester = HealthAssistantTester()
+    tester = HealthAssistantTester(write_report=not args.no_report)
     exit_code = tester.run_all_tests()
     sys.exit(exit_code)
 